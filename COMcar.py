@@ -1,13 +1,17 @@
 import os
 import math
 import matplotlib.pyplot as plt
-import matplotlib.image as mpimg
+from matplotlib.patches import Polygon, Circle
 import platform
 
+from car_presets import CAR_MODELS, TIRE_RADIUS
+from nurbs_basis import evaluate_many, silhouette_polygon
+from survey_data import CSV_FILE, load_responses
+
 # === 設定 ===
-INPUT_DIR = "output_images_attributes"  # 整理された画像があるフォルダ
 OUTPUT_DIR = "summary_images"           # まとめ画像の保存先
 COLS = 5                                # 横に並べる画像の数
+OUTPUT_FORMAT = "png"                   # "png" / "pdf" / "svg"（pdf・svg はベクター形式で保存）
 
 # === 日本語フォント設定（ここを追加しました） ===
 system_name = platform.system()
@@ -24,28 +28,26 @@ else:
 if not os.path.exists(OUTPUT_DIR):
     os.makedirs(OUTPUT_DIR)
 
-if not os.path.exists(INPUT_DIR):
-    print(f"エラー: '{INPUT_DIR}' が見つかりません。先に以前のプログラムを実行してください。")
+if not os.path.exists(CSV_FILE):
+    print(f"エラー: '{CSV_FILE}' が見つかりません。先に newGO.py でデータを取得してください。")
     exit()
 
-# フォルダ一覧を取得
-folders = [f for f in os.listdir(INPUT_DIR) if os.path.isdir(os.path.join(INPUT_DIR, f))]
+# 回答データを読み込み、曲線を一括評価（PNG を経由せず直接描画する）
+responses = load_responses(CSV_FILE)
+curves = evaluate_many([r["ctrlpts"] for r in responses], [r["weights"] for r in responses])
 
-print(f"--- 画像のまとめ作成を開始します（全 {len(folders)} カテゴリ） ---")
+# 形容詞ごとにまとめる
+categories = {}
+for row, curve_pts in zip(responses, curves):
+    categories.setdefault(row["adjective"], []).append((row, curve_pts))
 
-for folder_name in folders:
-    folder_path = os.path.join(INPUT_DIR, folder_name)
-    
-    # 画像ファイルを取得
-    images = [f for f in os.listdir(folder_path) if f.lower().endswith('.png')]
-    
-    if not images:
-        continue
+print(f"--- 画像のまとめ作成を開始します（全 {len(categories)} カテゴリ） ---")
 
-    # 並べ替え
-    images.sort()
+for folder_name, items in categories.items():
+    # 並べ替え（行番号順 = 以前の画像ファイル名順）
+    items.sort(key=lambda item: item[0]["idx"])
 
-    num_images = len(images)
+    num_images = len(items)
     rows = math.ceil(num_images / COLS)
 
     print(f"カテゴリ '{folder_name}': {num_images}枚 -> {rows}行 x {COLS}列 で作成中...")
@@ -53,52 +55,42 @@ for folder_name in folders:
     # 画像サイズ設定
     fig_width = 20
     fig_height = rows * 3.5  # 高さを少し広げました（文字が切れないように）
-    
-    fig, axes = plt.subplots(rows, COLS, figsize=(fig_width, fig_height))
-    
-    # axesの配列調整
-    if rows == 1 and COLS == 1:
-        axes = [axes]
-    elif rows == 1 or COLS == 1:
-        axes = axes.flatten()
-    elif rows > 1 and COLS > 1:
-        axes = axes.flatten()
+
+    fig, axes = plt.subplots(rows, COLS, figsize=(fig_width, fig_height), squeeze=False)
+    axes = axes.flatten()
 
     # タイトル
     fig.suptitle(f"Category: {folder_name} (Total: {num_images})", fontsize=24, y=0.99)
 
-    # 各画像を配置
+    # 各シルエットをセルに直接描画
     for i, ax in enumerate(axes):
-        if i < num_images:
-            img_path = os.path.join(folder_path, images[i])
-            try:
-                img = mpimg.imread(img_path)
-                ax.imshow(img)
-                
-                # ファイル名から情報を表示
-                # 例: 001_SUV_20s_M_cool.png
-                fname = os.path.splitext(images[i])[0]
-                parts = fname.split('_')
-                if len(parts) >= 5: # ID, 車種, 年代, 性別, 形容詞
-                    # 日本語や記号も文字化けせずに表示されます
-                    label = f"ID:{parts[0]} {parts[1]}\n({parts[2]} / {parts[3]})"
-                else:
-                    label = fname
-                
-                ax.set_title(label, fontsize=12)
-                ax.axis('off')
-            except Exception as e:
-                print(f"  読み込みエラー: {images[i]}")
-                ax.axis('off')
-        else:
-            # 余白
-            ax.axis('off')
+        ax.axis('off')
+        if i >= num_images:
+            continue  # 余白
+
+        row, curve_pts = items[i]
+        try:
+            for t in CAR_MODELS.get(row["model"], {}).get("tire_coords", []):
+                ax.add_patch(Circle((t[0], t[1]), TIRE_RADIUS, color='black', zorder=1))
+
+            poly_pts = silhouette_polygon(curve_pts, row["ctrlpts"])
+            ax.add_patch(Polygon(poly_pts, closed=True, color='black', alpha=1.0))
+
+            ax.set_aspect('equal')
+            ax.set_xlim(-3, 13)
+            ax.set_ylim(-3, 8)
+
+            # 例: ID:001 SUV (20s / M)
+            label = f"ID:{row['idx']:03d} {row['model']}\n({row['age']} / {row['gender']})"
+            ax.set_title(label, fontsize=12)
+        except Exception as e:
+            print(f"  描画エラー: row {row['idx']}: {e}")
 
     # レイアウト調整
     plt.tight_layout(rect=[0, 0, 1, 0.97])
-    
+
     # 保存
-    save_path = os.path.join(OUTPUT_DIR, f"{folder_name}_summary.png")
+    save_path = os.path.join(OUTPUT_DIR, f"{folder_name}_summary.{OUTPUT_FORMAT}")
     plt.savefig(save_path, bbox_inches='tight')
     plt.close(fig)
 
@@ -5,7 +5,8 @@ import matplotlib.pyplot as plt
 from matplotlib.patches import Polygon
 from geomdl import NURBS
 from geomdl import knotvector
-import matplotlib.image as mpimg
+
+from bg_cache import show_background
 
 CAR_MODELS = {
     "Kei car": {
@@ -145,8 +146,7 @@ class NURBSApp(tk.Tk):
 
     def draw_background(self):
         try:
-            bg = mpimg.imread(self.model_data["bg_image"])
-            self.ax.imshow(bg, extent=[-1, 11, -1.5, 6], aspect='auto', alpha=0.2)
+            show_background(self.ax, self.model_data)
         except Exception as e:
             print("背景画像読み込みエラー:", e)
 
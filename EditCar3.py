@@ -3,9 +3,14 @@ from tkinter import ttk
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import matplotlib.pyplot as plt
 from matplotlib.patches import Polygon
+from matplotlib.collections import LineCollection
 from geomdl import NURBS
 from geomdl import knotvector
-import matplotlib.image as mpimg
+import numpy as np
+
+from nurbs_basis import curvature_comb
+from shape_constraints import tire_clearance, ground_penetration, MIN_CLEARANCE, GROUND_TOL
+from bg_cache import show_background
 
 CAR_MODELS = {
     "Kei car": {
@@ -101,6 +106,11 @@ class NURBSApp(tk.Tk):
         self.alpha_slider.bind("<B1-Motion>", self.update_curve)
         self.alpha_slider.bind("<ButtonRelease-1>", self.update_curve)
 
+        # 曲率くし（丸い/尖った部分の確認用）
+        self.show_comb = tk.BooleanVar(value=False)
+        comb_check = ttk.Checkbutton(self.slider_frame, text="Curvature Comb", variable=self.show_comb, command=self.update_curve)
+        comb_check.pack(pady=(0, 10))
+
         reset_button = ttk.Button(self.slider_frame, text="Reset", command=self.reset_curve)
         reset_button.pack(pady=(0, 10))
 
@@ -128,6 +138,15 @@ class NURBSApp(tk.Tk):
         self.filled_patch = Polygon(self.curve.evalpts + [self.ctrlpts[-1], self.ctrlpts[0]], closed=True, color='black', alpha=self.alpha_slider.get())
         self.ax.add_patch(self.filled_patch)
 
+        self.comb_lines = LineCollection([], colors='tab:red', linewidths=0.6)
+        self.ax.add_collection(self.comb_lines)
+        self.comb_envelope, = self.ax.plot([], [], color='tab:red', linewidth=0.8)
+        self.draw_comb()
+
+        # タイヤ・接地線との干渉の表示
+        self.constraint_text = self.ax.text(0.02, 0.97, "", transform=self.ax.transAxes, va='top', fontsize=10)
+        self.update_constraints()
+
         self.ax.legend()
         self.ax.set_xlim(-3, 13)
         self.ax.set_ylim(-3, 8)
@@ -142,8 +161,7 @@ class NURBSApp(tk.Tk):
 
     def draw_background(self):
         try:
-            bg = mpimg.imread(self.model_data["bg_image"])
-            self.ax.imshow(bg, extent=[-1, 11, -1.5, 6], aspect='auto', alpha=0.2)
+            show_background(self.ax, self.model_data)
         except Exception as e:
             print("背景画像読み込みエラー:", e)
 
@@ -204,8 +222,30 @@ class NURBSApp(tk.Tk):
         self.filled_patch = Polygon(self.curve.evalpts + [new_ctrlpts[-1], new_ctrlpts[0]], closed=True, color='black', alpha=self.alpha_slider.get())
         self.ax.add_patch(self.filled_patch)
 
+        self.draw_comb()
+        self.update_constraints()
         self.canvas.draw_idle()
 
+    def draw_comb(self):
+        if not self.show_comb.get():
+            self.comb_lines.set_segments([])
+            self.comb_envelope.set_data([], [])
+            return
+        # geomdl と同じく重みは制御点数までを使う
+        base, tip = curvature_comb(self.curve.ctrlpts, self.curve.weights)
+        self.comb_lines.set_segments(np.stack([base, tip], axis=1))
+        self.comb_envelope.set_data(tip[:, 0], tip[:, 1])
+
+    def update_constraints(self):
+        curve_pts = np.array(self.curve.evalpts)
+        clearance = tire_clearance(curve_pts, self.model_data["tire_coords"])
+        penetration = ground_penetration(curve_pts, self.model_data["ground_line"][2])
+        ok = np.all(clearance >= MIN_CLEARANCE) and penetration <= GROUND_TOL
+        self.constraint_text.set_text(
+            f"Tire clearance: front {clearance[0]:.2f} / rear {clearance[-1]:.2f}\n"
+            f"Ground penetration: {penetration:.2f}")
+        self.constraint_text.set_color('black' if ok else 'tab:red')
+
     def reset_curve(self):
         for i, pt in enumerate(self.initial_ctrlpts):
             self.sliders_x[i].set(pt[0])
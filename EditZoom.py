@@ -5,7 +5,8 @@ import matplotlib.pyplot as plt
 from matplotlib.patches import Polygon
 from geomdl import NURBS
 from geomdl import knotvector
-import matplotlib.image as mpimg
+
+from bg_cache import show_background, refresh_background
 
 CAR_MODELS = {
     "Kei car": {
@@ -114,6 +115,9 @@ class NURBSApp(tk.Tk):
         rely = (ydata - cur_ylim[0]) / (cur_ylim[1] - cur_ylim[0])
         self.ax.set_xlim([xdata - relx * new_width, xdata + (1 - relx) * new_width])
         self.ax.set_ylim([ydata - rely * new_height, ydata + (1 - rely) * new_height])
+        # 拡大したら細かい段、縮小したら粗い段の背景画像に差し替える
+        if self.bg_artist is not None:
+            refresh_background(self.ax, self.bg_artist, self.model_data)
         self.canvas.draw_idle()
 
     def load_model(self, model_name):
@@ -144,9 +148,9 @@ class NURBSApp(tk.Tk):
         self.create_sliders()
 
     def draw_background(self):
+        self.bg_artist = None
         try:
-            bg = mpimg.imread(self.model_data["bg_image"])
-            self.ax.imshow(bg, extent=[-1, 11, -1.5, 6], aspect='auto', alpha=0.2)
+            self.bg_artist = show_background(self.ax, self.model_data)
         except Exception as e:
             print("背景画像読み込みエラー:", e)
 
@@ -9,6 +9,8 @@ import ast
 import re
 import shutil
 
+from shape_check import check_silhouette, REASON_MESSAGES
+
 # === 設定 ===
 CSV_FILE = "car_data.csv"
 OUTPUT_DIR = "output_images"
@@ -125,6 +127,7 @@ print("※ 作成済みの画像はスキップします")
 
 count_gen = 0
 count_skipped = 0
+count_invalid = 0
 
 for row in cleaned_data:
     try:
@@ -158,6 +161,13 @@ for row in cleaned_data:
         curve.delta = 0.01
         curve.evaluate()
 
+        # 自己交差・つぶれた形状は描画しない
+        reason, _ = check_silhouette(curve.evalpts, ctrlpts)
+        if reason != "ok":
+            print(f"不正な形状のためスキップ: row {row['idx']} ({REASON_MESSAGES[reason]})")
+            count_invalid += 1
+            continue
+
         fig, ax = plt.subplots(figsize=(10, 7))
         ax.set_axis_off()
 
@@ -183,7 +193,7 @@ for row in cleaned_data:
     except Exception as e:
         print(f"Error generating image for row {row['idx']}: {e}")
 
-print(f"✅ 生成完了: 新規 {count_gen}枚 (スキップ {count_skipped}枚)")
+print(f"✅ 生成完了: 新規 {count_gen}枚 (スキップ {count_skipped}枚, 不正な形状 {count_invalid}枚)")
 
 # === 3. フォルダ整理 ===
 print(f"--- [Step 3] フォルダ整理を開始します ---")
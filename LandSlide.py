@@ -1,42 +1,150 @@
+import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.svm import SVC
 from sklearn.metrics import classification_report
+from sklearn.kernel_approximation import RBFSampler, Nystroem
+from sklearn.linear_model import SGDClassifier
 
-# CSV読み込み（先頭2行スキップ）
-df = pd.read_csv("コピー下関1980.csv", skiprows=2)
+from rain_features import rolling_features, iter_feature_chunks, CHUNK_SIZE
 
-# カラム名を設定
-df.columns = ["Month", "Day", "Hour", "Hourly_rain", "Cumulative_rain", "Output"]
+# === 設定 ===
+CSV_FILE = "コピー下関1980.csv"
+MODE = "svc"            # "svc": RBFカーネルのSVM / "approx": RBF特徴写像 + 線形分類器（大規模データ向け）
+FEATURE_MAP = "rff"     # "rff": ランダムフーリエ特徴 / "nystroem": Nyström 近似
+N_COMPONENTS = 300      # 特徴写像の次元
+BATCH_SIZE = 10000      # ミニバッチの行数
+N_EPOCHS = 5            # ミニバッチ学習の周回数
+USE_ROLLING_FEATURES = False  # True: 移動窓の雨量特徴量（rain_features.py）も使う
 
-# 欠損値を除去
-df = df.dropna()
+COLUMNS = ["Month", "Day", "Hour", "Hourly_rain", "Cumulative_rain", "Output"]
 
-# Outputを疑似的に再定義
-df["Output"] = (
-    (df["Hourly_rain"] >= 30) | (df["Cumulative_rain"] >= 200)
-).astype(int)
 
-# 特徴量とラベル
-X = df[["Hourly_rain", "Cumulative_rain"]]
-y = df["Output"]
+# 疑似ラベルの作成
+def add_label(df):
+    # Outputを疑似的に再定義
+    df["Output"] = (
+        (df["Hourly_rain"] >= 30) | (df["Cumulative_rain"] >= 200)
+    ).astype(int)
+    return df
 
-# クラスの分布を表示
-print("疑似崩壊ラベルの分布:")
-print(y.value_counts())
 
-# データ分割（stratifyでクラス比率を維持）
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42, stratify=y
-)
+# CSV読み込み（先頭2行スキップ）と疑似ラベルの作成
+def load_data(path=CSV_FILE, rolling=USE_ROLLING_FEATURES):
+    df = pd.read_csv(path, skiprows=2)
 
-# RBFカーネルのSVMを学習
-model = SVC(kernel='rbf', C=1.0, gamma='scale')
-model.fit(X_train, y_train)
+    # カラム名を設定
+    df.columns = COLUMNS
 
-# 予測と評価
-y_pred = model.predict(X_test)
+    # 移動窓の特徴量（欠損除去の前に、連続した時系列のまま計算）
+    if rolling:
+        df = pd.concat([df, rolling_features(df["Hourly_rain"])], axis=1)
 
-print("\n=== 土砂崩れ危険性（疑似）予測レポート ===")
-print(classification_report(y_test, y_pred))
+    # 欠損値を除去
+    df = df.dropna()
 
+    return add_label(df)
+
+
+# 複数年の CSV をチャンクごとに読み込む（ApproxRBFClassifier.partial_fit 用）
+def load_data_chunks(paths, chunksize=CHUNK_SIZE):
+    for chunk in iter_feature_chunks(paths, COLUMNS, chunksize=chunksize):
+        yield add_label(chunk.dropna())
+
+
+def feature_columns(df):
+    return [c for c in df.columns if c not in ("Month", "Day", "Hour", "Output")]
+
+
+# 従来の学習: RBFカーネルのSVM（サンプル数の2〜3乗で計算量が増える）
+def fit_svc(X_train, y_train):
+    model = SVC(kernel='rbf', C=1.0, gamma='scale')
+    model.fit(X_train, y_train)
+    return model
+
+
+# === RBFカーネル近似 + 線形分類器 ===
+# 明示的な特徴写像 z(x)（z(x)・z(x') ≈ exp(-gamma |x - x'|^2)）の上で
+# 線形SVM（hinge損失）をミニバッチの partial_fit で学習する
+# gamma は SVC の gamma='scale' と同じく 1 / (特徴数 * X.var()) を最初のバッチから決める
+class ApproxRBFClassifier:
+    def __init__(self, feature_map=FEATURE_MAP, n_components=N_COMPONENTS,
+                 batch_size=BATCH_SIZE, n_epochs=N_EPOCHS, alpha=1e-5, random_state=42):
+        self.feature_map = feature_map
+        self.n_components = n_components
+        self.batch_size = batch_size
+        self.n_epochs = n_epochs
+        self.random_state = random_state
+        self.mapper = None
+        self.gamma = None
+        self.clf = SGDClassifier(loss="hinge", alpha=alpha, random_state=random_state)
+
+    def _init_mapper(self, X):
+        self.gamma = 1.0 / (X.shape[1] * X.var())
+        if self.feature_map == "nystroem":
+            self.mapper = Nystroem(gamma=self.gamma, n_components=min(self.n_components, len(X)),
+                                   random_state=self.random_state)
+        else:
+            self.mapper = RBFSampler(gamma=self.gamma, n_components=self.n_components,
+                                     random_state=self.random_state)
+        self.mapper.fit(X)
+
+    # 1バッチ分の学習（ストリーミング入力用）
+    def partial_fit(self, X, y, classes=(0, 1)):
+        X = np.asarray(X, dtype=float)
+        if self.mapper is None:
+            self._init_mapper(X)
+        self.clf.partial_fit(self.mapper.transform(X), np.asarray(y), classes=np.asarray(classes))
+        return self
+
+    # メモリ上のデータをミニバッチに分けて学習
+    def fit(self, X, y):
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y)
+        rng = np.random.default_rng(self.random_state)
+        classes = np.unique(y)
+        for _ in range(self.n_epochs):
+            order = rng.permutation(len(X))
+            for s in range(0, len(X), self.batch_size):
+                idx = order[s:s + self.batch_size]
+                self.partial_fit(X[idx], y[idx], classes)
+        return self
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=float)
+        out = np.empty(len(X), dtype=self.clf.classes_.dtype)
+        for s in range(0, len(X), self.batch_size):
+            out[s:s + self.batch_size] = self.clf.predict(self.mapper.transform(X[s:s + self.batch_size]))
+        return out
+
+
+def fit_model(X_train, y_train, mode=MODE):
+    if mode == "approx":
+        return ApproxRBFClassifier().fit(X_train, y_train)
+    return fit_svc(X_train, y_train)
+
+
+if __name__ == "__main__":
+    df = load_data(CSV_FILE)
+
+    # 特徴量とラベル
+    X = df[feature_columns(df)]
+    y = df["Output"]
+
+    # クラスの分布を表示
+    print("疑似崩壊ラベルの分布:")
+    print(y.value_counts())
+
+    # データ分割（stratifyでクラス比率を維持）
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+
+    # 学習（MODE で SVC / カーネル近似を切り替え）
+    model = fit_model(X_train, y_train, MODE)
+
+    # 予測と評価
+    y_pred = model.predict(X_test)
+
+    print("\n=== 土砂崩れ危険性（疑似）予測レポート ===")
+    print(classification_report(y_test, y_pred))
@@ -0,0 +1,177 @@
+import os
+import time
+import numpy as np
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import GridSearchCV, StratifiedKFold
+
+from car_presets import CAR_MODELS, normalize_shape
+from nurbs_basis import evaluate_many, resample_curves, curvature_profiles
+from shape_metrics import metrics_many
+from survey_data import CSV_FILE, ADJ_LABELS, load_responses
+
+# === 設定 ===
+MODELS = list(CAR_MODELS)
+MAX_CTRLPTS = max(len(m["ctrlpts"]) for m in CAR_MODELS.values())
+N_POINTS = 32                            # 特徴量に使う再サンプリング点数
+C_GRID = [1e-4, 3e-4, 1e-3, 3e-3, 0.01, 0.03, 0.1, 0.3, 1.0]  # ロジスティック回帰の正則化（交差検証で選ぶ）
+N_FOLDS = 5
+FEATURE_VERSION = 3                      # 特徴量の定義を変えたら上げる（キャッシュを作り直す）
+GEOMETRY_NAMES = ["height", "length", "roof_length", "nose_angle", "area", "nose_curvature", "tail_curvature"]
+
+
+def feature_cache_path(csv_file):
+    return csv_file + ".features.cache.npz"
+
+
+# === 形状の幾何特徴 ===
+# 高さ・全長・屋根の長さ・面積は shape_metrics の解析的な値を使う
+# nose_angle: 曲線の始点側（車の前）で、弧長で先頭10%の区間の傾き [度]
+# nose_curvature / tail_curvature: 前後それぞれ全長の25%の範囲での最大曲率（log1p, 丸い/尖った鼻先の目安）
+def shape_geometry(models, ctrlpts_list, weights_list, curves, resampled):
+    m = metrics_many(models, ctrlpts_list, weights_list)
+    k = max(1, resampled.shape[1] // 10)
+    d = resampled[:, k] - resampled[:, 0]
+    nose_angle = np.degrees(np.arctan2(d[:, 1], d[:, 0]))
+
+    kappa = np.log1p(np.abs(curvature_profiles(ctrlpts_list, weights_list)))
+    x = np.array(curves)[:, :, 0]
+    xmin, xmax = x.min(axis=1, keepdims=True), x.max(axis=1, keepdims=True)
+    band = 0.25 * (xmax - xmin)
+    nose = np.where(x <= xmin + band, kappa, 0.0).max(axis=1)
+    tail = np.where(x >= xmax - band, kappa, 0.0).max(axis=1)
+    return np.column_stack([m["height"], m["length"], m["roof_length"], nose_angle, m["area"], nose, tail])
+
+
+# 回答（または形状）のリストから特徴行列を作る
+# [車種の one-hot | 正規化した制御点・重み（制御点数の違いは0で埋める） | 再サンプリング曲線 | 幾何特徴]
+def shape_features(models, ctrlpts_list, weights_list, n_points=N_POINTS):
+    n = len(models)
+    onehot = np.zeros((n, len(MODELS)))
+    norm = np.zeros((n, 3 * MAX_CTRLPTS))
+    for i, (model, p, w) in enumerate(zip(models, ctrlpts_list, weights_list)):
+        onehot[i, MODELS.index(model)] = 1.0
+        v = normalize_shape(model, p, w)
+        m = len(p)
+        norm[i, :2 * m] = v[:2 * m]
+        norm[i, 2 * MAX_CTRLPTS:2 * MAX_CTRLPTS + m] = v[2 * m:]
+    curves = evaluate_many(ctrlpts_list, weights_list)
+    resampled = resample_curves(curves, n_points)
+    geometry = shape_geometry(models, ctrlpts_list, weights_list, curves, resampled)
+    return np.hstack([onehot, norm, resampled.reshape(n, -1), geometry])
+
+
+def _usable(row):
+    return (row["model"] in CAR_MODELS and row["adjective"] in ADJ_LABELS
+            and len(row["ctrlpts"]) == len(CAR_MODELS[row["model"]]["ctrlpts"]))
+
+
+def _row_key(row):
+    return f"{row['idx']}|{row['timestamp']}"
+
+
+# === 特徴行列のキャッシュ ===
+# 回答ごとのキー（行番号 + タイムスタンプ）で保存し、キャッシュにない回答の分だけ計算して追記する
+def load_feature_matrix(responses=None, csv_file=CSV_FILE, use_cache=True):
+    if responses is None:
+        responses = load_responses(csv_file)
+    rows = [r for r in responses if _usable(r)]
+    keys = [_row_key(r) for r in rows]
+    cache_file = feature_cache_path(csv_file)
+
+    cached = {}
+    if use_cache and os.path.exists(cache_file):
+        try:
+            with np.load(cache_file, allow_pickle=False) as z:
+                if int(z["version"]) == FEATURE_VERSION:
+                    cached = dict(zip(z["keys"].tolist(), z["X"]))
+        except Exception:
+            pass
+
+    new_rows = [r for r, k in zip(rows, keys) if k not in cached]
+    if new_rows:
+        F = shape_features([r["model"] for r in new_rows], [r["ctrlpts"] for r in new_rows],
+                           [r["weights"] for r in new_rows])
+        cached.update(zip((_row_key(r) for r in new_rows), F))
+        if use_cache:
+            try:
+                np.savez(cache_file, version=FEATURE_VERSION, keys=np.array(list(cached)),
+                         X=np.array(list(cached.values())))
+            except OSError as e:
+                print(f"特徴量キャッシュを保存できませんでした: {e}")
+
+    X = np.array([cached[k] for k in keys]) if keys else np.empty((0, 0))
+    y = np.array([r["adjective"] for r in rows])
+    return X, y, rows
+
+
+# === 形容詞の分類器 ===
+# 標準化 + 多クラスのロジスティック回帰。正則化 C は層化 k 分割の交差検証で選ぶ（n_jobs=-1 で並列）
+# 予測は標準化と線形層を1つの行列にまとめ、numpy の行列積 + softmax だけで計算する（エディタの毎回の編集用）
+class AdjectiveClassifier:
+    def __init__(self, c_grid=C_GRID, n_folds=N_FOLDS, n_jobs=-1):
+        self.c_grid = list(c_grid)
+        self.n_folds = n_folds
+        self.n_jobs = n_jobs
+        self.pipeline = None
+        self.cv_score = None
+        self.C = None
+        self.classes = None
+        self.W = None
+        self.b = None
+
+    def fit(self, X, y):
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y)
+        n_folds = max(2, min(self.n_folds, np.unique(y, return_counts=True)[1].min()))
+        search = GridSearchCV(
+            make_pipeline(StandardScaler(), LogisticRegression(max_iter=2000)),
+            {"logisticregression__C": self.c_grid},
+            cv=StratifiedKFold(n_folds, shuffle=True, random_state=0), n_jobs=self.n_jobs)
+        search.fit(X, y)
+        self.pipeline = search.best_estimator_
+        self.cv_score = search.best_score_
+        self.C = search.best_params_["logisticregression__C"]
+
+        scaler, clf = self.pipeline.named_steps.values()
+        self.classes = clf.classes_
+        self.W = (clf.coef_ / scaler.scale_).T
+        self.b = clf.intercept_ - scaler.mean_ @ self.W
+        return self
+
+    def fit_responses(self, responses=None, csv_file=CSV_FILE):
+        X, y, _ = load_feature_matrix(responses, csv_file)
+        return self.fit(X, y)
+
+    # 特徴行列 X から各形容詞の確率（件数 x クラス数）
+    def predict_proba(self, X):
+        z = np.atleast_2d(X) @ self.W + self.b
+        z = np.exp(z - z.max(axis=1, keepdims=True))
+        return z / z.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        return self.classes[np.argmax(self.predict_proba(X), axis=1)]
+
+    # エディタ表示用: 1つの形状の {形容詞: 確率}
+    def predict_shape(self, model, ctrlpts, weights):
+        p = self.predict_proba(shape_features([model], [ctrlpts], [weights]))[0]
+        return dict(zip(self.classes.tolist(), p.tolist()))
+
+
+if __name__ == "__main__":
+    t0 = time.perf_counter()
+    X, y, rows = load_feature_matrix()
+    print(f"特徴行列: {X.shape} ({(time.perf_counter() - t0) * 1000:.1f} ms)")
+
+    t0 = time.perf_counter()
+    clf = AdjectiveClassifier().fit(X, y)
+    print(f"学習: C={clf.C}  交差検証の正解率={clf.cv_score:.3f} "
+          f"(偶然={1 / len(clf.classes):.3f}, {time.perf_counter() - t0:.2f} 秒)")
+
+    for model, preset in CAR_MODELS.items():
+        t0 = time.perf_counter()
+        proba = clf.predict_shape(model, preset["ctrlpts"], preset["weights"])
+        dt = (time.perf_counter() - t0) * 1000
+        best = max(proba, key=proba.get)
+        print(f"  {model} の初期形状: {best} ({proba[best]:.2f}), {dt:.2f} ms")
@@ -0,0 +1,143 @@
+import warnings
+import numpy as np
+
+from car_presets import CAR_MODELS, normalize_shape
+from survey_data import CSV_FILE, ADJ_LABELS, load_responses
+from lec09_RBF import RBF, predict, tunehyperparameters
+
+# === 設定 ===
+RADII = [0.1, 0.2, 0.4, 0.8, 1.6, 3.2, 6.4, 12.8]
+LAMBDAS = [1.0e-6, 1.0e-4, 1.0e-2, 1.0e-1, 1.0, 10.0]
+MIN_SAMPLES = 5
+MAX_GRID_EXTENSIONS = 3     # 最適値がグリッドの端に来たとき、グリッドを外側へ広げる回数の上限
+
+
+# === 形容詞スコアの多出力 RBF サロゲート（車種ごと） ===
+# 入力: 正規化した制御点・重み、出力: 6つの形容詞のスコア（回答=1, それ以外=0）
+# 全出力で同じカーネル行列の Cholesky 分解を共有し、まとめて解く
+class AdjectiveSurrogate:
+    def __init__(self, model):
+        self.model = model
+        self.n_ctrlpts = len(CAR_MODELS[model]["ctrlpts"])
+        self.c = None
+        self.w = None
+        self.r = None
+        self.radius = None
+        self.Lambda = None
+        self.loocv = None
+        self.on_grid_edge = []
+
+    def fit(self, X, Y, radius=None, Lambda=None):
+        X = np.asarray(X, dtype=float)
+        Y = np.asarray(Y, dtype=float)
+        span = X.max(axis=0) - X.min(axis=0)
+        span[span == 0] = 1.0
+        if radius is None or Lambda is None:
+            radius, Lambda, self.loocv = self.tune(X, Y)
+        self.radius, self.Lambda = radius, Lambda
+        self.r = radius * span
+        self.c = X
+        self.w = RBF(X, self.c, self.r, Lambda, Y)
+        return self
+
+    # LOOCV のグリッド探索。最適値がグリッドの端なら、その側へ
+    # 半径は2倍ずつ・正則化は10倍ずつ2点広げて探し直す（追加分だけ計算する）
+    # MAX_GRID_EXTENSIONS 回広げても端のままなら警告する（平坦なモデルを黙って使わない）
+    def tune(self, X, Y, radii=RADII, lambdas=LAMBDAS):
+        radii, lambdas = sorted(radii), sorted(lambdas)
+        best, table = tunehyperparameters(X, X, Y, radii, lambdas)
+        for _ in range(MAX_GRID_EXTENSIONS + 1):
+            edges = self._grid_edges(best, radii, lambdas)
+            if not edges or _ == MAX_GRID_EXTENSIONS:
+                break
+            new_radii, new_lambdas = [], []
+            if "radius_min" in edges:
+                new_radii += [radii[0] / 4, radii[0] / 2]
+            if "radius_max" in edges:
+                new_radii += [radii[-1] * 2, radii[-1] * 4]
+            if "lambda_min" in edges:
+                new_lambdas += [lambdas[0] / 100, lambdas[0] / 10]
+            if "lambda_max" in edges:
+                new_lambdas += [lambdas[-1] * 10, lambdas[-1] * 100]
+            if new_radii:
+                _, rows = tunehyperparameters(X, X, Y, new_radii, lambdas)
+                table += rows
+            radii = sorted(radii + new_radii)
+            if new_lambdas:
+                _, rows = tunehyperparameters(X, X, Y, radii, new_lambdas)
+                table += rows
+            lambdas = sorted(lambdas + new_lambdas)
+            best = min(table, key=lambda row: row[2])
+        if edges:
+            warnings.warn(f"{self.model}: radius={best[0]:g}, lambda={best[1]:g} が探索範囲の端です"
+                          f"（{', '.join(edges)}）。予測がほぼ一定の可能性があります")
+        self.on_grid_edge = edges
+        return best
+
+    @staticmethod
+    def _grid_edges(best, radii, lambdas):
+        radius, Lambda, _ = best
+        edges = []
+        if radius == radii[0]:
+            edges.append("radius_min")
+        if radius == radii[-1]:
+            edges.append("radius_max")
+        if Lambda == lambdas[0]:
+            edges.append("lambda_min")
+        if Lambda == lambdas[-1]:
+            edges.append("lambda_max")
+        return edges
+
+    def fit_responses(self, responses, **kwargs):
+        X, Y = self.training_data(responses)
+        return self.fit(X, Y, **kwargs)
+
+    def training_data(self, responses):
+        X, Y = [], []
+        for row in responses:
+            if row["model"] != self.model or row["adjective"] not in ADJ_LABELS:
+                continue
+            if len(row["ctrlpts"]) != self.n_ctrlpts:
+                continue
+            X.append(normalize_shape(self.model, row["ctrlpts"], row["weights"]))
+            y = np.zeros(len(ADJ_LABELS))
+            y[ADJ_LABELS.index(row["adjective"])] = 1.0
+            Y.append(y)
+        return np.array(X), np.array(Y)
+
+    # 正規化ベクトル X (件数 x 次元) のスコア (件数 x 6) を一括計算
+    def predict(self, X, chunk=None):
+        return predict(X, self.w, self.c, self.r, chunk)
+
+    # 形状を複数まとめて評価（ctrlpts: (件数, n, 2), weights: (件数, n)）
+    def predict_shapes(self, ctrlpts, weights, chunk=None):
+        X = [normalize_shape(self.model, p, w) for p, w in zip(ctrlpts, weights)]
+        return self.predict(np.array(X), chunk)
+
+    # エディタ表示用: 1つの形状の {形容詞: スコア}
+    def scores(self, ctrlpts, weights):
+        s = self.predict(normalize_shape(self.model, ctrlpts, weights))[0]
+        return dict(zip(ADJ_LABELS, s.tolist()))
+
+
+# 回答データから全車種のサロゲートを学習
+def train_surrogates(responses=None, csv_file=CSV_FILE):
+    if responses is None:
+        responses = load_responses(csv_file)
+    surrogates = {}
+    for model in CAR_MODELS:
+        s = AdjectiveSurrogate(model)
+        X, Y = s.training_data(responses)
+        if len(X) < MIN_SAMPLES:
+            continue
+        surrogates[model] = s.fit(X, Y)
+    return surrogates
+
+
+if __name__ == "__main__":
+    surrogates = train_surrogates()
+    for model, s in surrogates.items():
+        print(f"{model}: {len(s.c)}件  radius={s.radius} lambda={s.Lambda} LOOCV={s.loocv:.4f}")
+        preset = CAR_MODELS[model]
+        scores = s.scores(preset["ctrlpts"], preset["weights"])
+        print("  初期形状のスコア:", {k: round(v, 3) for k, v in scores.items()})
@@ -3,7 +3,6 @@ import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.patches import Polygon, Circle
 from geomdl import NURBS, knotvector
-import matplotlib.image as mpimg
 import pandas as pd
 import datetime
 import os
@@ -12,6 +11,9 @@ from google.oauth2.service_account import Credentials
 import json
 from datetime import datetime, timedelta
 
+from shape_check import check_silhouette, REASON_MESSAGES
+from bg_cache import show_background
+
 scope = [
     "https://spreadsheets.google.com/feeds",
     "https://www.googleapis.com/auth/drive"
@@ -212,11 +214,13 @@ curve.knotvector = knotvector.generate(curve.degree, len(new_ctrlpts))
 curve.delta = 0.01
 curve.evaluate()
 
+# 自己交差・つぶれた形状の検査（保存前に止める）
+shape_status, _ = check_silhouette(curve.evalpts, new_ctrlpts)
+
 # 描画
 fig, ax = plt.subplots(figsize=(10, 7))
 try:
-    bg = mpimg.imread(model_data.get("bg_image", ""))
-    ax.imshow(bg, extent=[-1, 11, -1.5, 6], aspect='auto', alpha=0.2)
+    show_background(ax, model_data)
 except Exception:
     pass
 
@@ -243,6 +247,9 @@ ax.grid(True)
 
 st.pyplot(fig)
 
+if shape_status != "ok":
+    st.warning(f"⚠️ {REASON_MESSAGES[shape_status]}。制御点を調整してください。(invalid shape: {shape_status})")
+
 # --- ユーザー入力欄 ---
 st.markdown("---")
 st.markdown("### 回答者情報(Respondent Information)")
@@ -295,6 +302,8 @@ def save_to_google_sheet(name, gender, age_group, model, ctrlpts, weights, alpha
 if st.button("保存する(save)"):
     if not name.strip():
         st.error("⚠️ 記入事項に回答してください。(please answer the questions)")
+    elif shape_status != "ok":
+        st.error(f"⚠️ 形状が不正なため保存できません: {REASON_MESSAGES[shape_status]}(invalid shape: {shape_status})")
     else:
         ok, err = save_to_google_sheet(
             name,
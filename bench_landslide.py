@@ -0,0 +1,50 @@
+import time
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import accuracy_score, f1_score
+
+from LandSlide import fit_svc, ApproxRBFClassifier
+
+# === 合成データでの比較: RBF-SVC vs. カーネル近似 + 線形分類器 ===
+# 時間雨量（多くは0の指数分布）と累積雨量（直近72時間の和）から LandSlide.py と同じ規則でラベルを作る
+SIZES = [2000, 5000, 10000, 20000, 50000, 200000]
+SVC_MAX = 50000   # これより大きいと SVC は時間がかかりすぎるため省略
+LABEL_NOISE = 0.02  # 実データのように境界付近が重なるよう、ラベルの一部を反転
+
+
+def synthetic_rain(n, seed=0):
+    rng = np.random.default_rng(seed)
+    wet = rng.random(n) < 0.15
+    hourly = np.where(wet, rng.exponential(6.0, n), 0.0)
+    # 雨の多い期間（台風・梅雨）を混ぜる
+    storm = np.repeat(rng.random(n // 48 + 1) < 0.05, 48)[:n]
+    hourly = hourly + np.where(storm, rng.exponential(12.0, n), 0.0)
+    cumulative = np.convolve(hourly, np.ones(72))[:n]
+    df = pd.DataFrame({"Hourly_rain": hourly, "Cumulative_rain": cumulative})
+    label = (df["Hourly_rain"] >= 30) | (df["Cumulative_rain"] >= 200)
+    df["Output"] = (label ^ (rng.random(n) < LABEL_NOISE)).astype(int)
+    return df
+
+
+if __name__ == "__main__":
+    print("    rows  model     fit[s]  accuracy  F1(1)")
+    for n in SIZES:
+        df = synthetic_rain(n)
+        X = df[["Hourly_rain", "Cumulative_rain"]].to_numpy()
+        y = df["Output"].to_numpy()
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.2, random_state=42, stratify=y
+        )
+        models = [("rff", lambda: ApproxRBFClassifier(feature_map="rff")),
+                  ("nystroem", lambda: ApproxRBFClassifier(feature_map="nystroem"))]
+        if n <= SVC_MAX:
+            models.insert(0, ("svc", lambda: fit_svc(X_train, y_train)))
+        for name, make in models:
+            t0 = time.perf_counter()
+            model = make()
+            if name != "svc":
+                model.fit(X_train, y_train)
+            dt = time.perf_counter() - t0
+            y_pred = model.predict(X_test)
+            print(f"{n:8d}  {name:8s}  {dt:7.3f}  {accuracy_score(y_test, y_pred):8.4f}  {f1_score(y_test, y_pred):.4f}")
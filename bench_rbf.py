@@ -0,0 +1,86 @@
+#############################################
+#  Benchmark: vectorized RBF() vs. the original loop implementation
+#############################################
+
+import copy
+import time
+import numpy as np
+
+from lec09_RBF import RBF, predict
+
+#------------------------------------------------------
+# original implementation of lec09_RBF.RBF (triple loop + np.linalg.inv)
+def RBF_loop(x,c,r,Lambda,y):
+    nv=int(len(x[0]))
+    ndata=int(len(x))
+    nbasis=int(len(c))
+    h=[]
+    for i in range(nbasis):
+        line=[]
+        for j in range(ndata):
+            dis=0.0
+            for k in range(nv):
+                dis+=float(-(x[j][k]-c[i][k])**2/r[k]**2)
+            line.append(np.exp(dis))
+        line=copy.deepcopy(line)
+        h.append(line)
+    h=np.array(h)
+    a=np.dot(h,h.T)
+    for i in range(nbasis):
+        a[i][i]+=Lambda
+    b=np.linalg.inv(a)
+    a=np.dot(b,h)
+    w=np.dot(a,y)
+    return w
+
+# original calcrbf (one query point, loops over basis x dimensions)
+def calcrbf_loop(x,w,c,r):
+    func=0.0
+    for i in range(len(c)):
+        dis=0.0
+        for k in range(len(x)):
+            dis+=((x[k]-c[i][k])/r[k])**2
+        func+=w[i]*np.exp(-dis)
+    return float(func)
+
+def timeit(f,*args,repeat=3):
+    best=None
+    for _ in range(repeat):
+        t0=time.perf_counter()
+        out=f(*args)
+        t=time.perf_counter()-t0
+        best=t if best is None else min(best,t)
+    return best,out
+
+if __name__ == '__main__':
+    rng=np.random.default_rng(0)
+    nv=3
+    r=np.full(nv,0.3)
+    Lambda=1.0e-3
+    print("ndata  loop[s]    vectorized[s]  speedup  max|dw|/max|w|")
+    for nd in [100,300,1000,3000]:
+        x=rng.random((nd,nv))
+        y=np.sin(3*x).sum(axis=1)
+        c=x.copy()
+        tv,wv=timeit(RBF,x,c,r,Lambda,y)
+        if nd<=1000:
+            tl,wl=timeit(RBF_loop,x,c,r,Lambda,y,repeat=1)
+            err=np.abs(wv-wl).max()/np.abs(wl).max()
+            print(f"{nd:5d}  {tl:9.4f}  {tv:13.4f}  {tl/tv:7.1f}  {err:.2e}")
+        else:
+            print(f"{nd:5d}  {'-':>9}  {tv:13.4f}  {'-':>7}  {'-':>8}")
+
+    print()
+    print("nquery  loop[s]    predict[s]     speedup  max|df|")
+    nd=300
+    x=rng.random((nd,nv))
+    y=np.sin(3*x).sum(axis=1)
+    w=RBF(x,x,r,Lambda,y)
+    for nq in [100,1000,10000]:
+        X=rng.random((nq,nv))
+        tv,fv=timeit(predict,X,w,x,r)
+        if nq<=1000:
+            tl,fl=timeit(lambda: np.array([calcrbf_loop(q,w,x,r) for q in X]),repeat=1)
+            print(f"{nq:6d}  {tl:9.4f}  {tv:13.4f}  {tl/tv:7.1f}  {np.abs(fv-fl).max():.2e}")
+        else:
+            print(f"{nq:6d}  {'-':>9}  {tv:13.4f}  {'-':>7}  {'-':>8}")
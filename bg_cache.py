@@ -0,0 +1,101 @@
+import os
+import numpy as np
+
+from bg_calibration import image_pyramid, background_extent
+
+# === 設定 ===
+FADE_ALPHA = 0.2          # 背景画像の薄さ（従来の imshow(..., alpha=0.2) と同じ見た目）
+VIEW_XLIM = (-3, 13)      # エディタの標準の表示範囲（x）
+MIN_SCALE = 0.75          # 表示の幅に対して段の幅がこれ以上あればよい（薄い背景なので少し粗くても見た目は変わらない）
+
+
+# 白い背景の上に alpha で重ねた色をあらかじめ計算しておく（描画のたびに半透明の合成をしない）
+# 不透明の RGBA で持つ（matplotlib が描画のたびに RGB -> RGBA に変換しなくてよい）
+def fade(image, alpha=FADE_ALPHA):
+    rgb = (255.0 - alpha * (255.0 - image[..., :3].astype(np.float32)) + 0.5).astype(np.uint8)
+    return np.dstack([rgb, np.full(rgb.shape[:2], 255, dtype=np.uint8)])
+
+
+# === 背景画像の各段（薄くしたもの）のメモリ上のキャッシュ ===
+# 画像ファイル・更新時刻ごとに1回だけ読み込んで作り、Tk のエディタと Streamlit（再実行しても
+# モジュールは読み込まれたまま）で共有する
+_levels = {}
+
+def faded_levels(image_path, alpha=FADE_ALPHA):
+    stat = os.stat(image_path)
+    key = (os.path.abspath(image_path), stat.st_mtime_ns, stat.st_size, alpha)
+    if key not in _levels:
+        levels = [fade(level, alpha) for level in image_pyramid(image_path)]
+        for level in levels:
+            level.setflags(write=False)
+        _levels[key] = levels
+    return _levels[key]
+
+
+# 画面上で width_px 画素の幅に表示するときの段（幅が MIN_SCALE 倍以上ある一番小さい段、なければ元の画像）
+# 描画の時間は元の画素数にほぼ比例する（1/2 の段で半分以下）
+def select_level(levels, width_px, min_scale=MIN_SCALE):
+    for level in reversed(levels):
+        if level.shape[1] >= min_scale * width_px:
+            return level
+    return levels[0]
+
+
+# 画像が画面上で占める幅 [画素] = 軸の幅 [画素] x extent の幅 / 表示範囲の幅（ズームすると大きくなる）
+def display_width(ax, extent, xlim=None):
+    if xlim is None:
+        xlim = ax.get_xlim()
+    return ax.get_window_extent().width * abs(extent[1] - extent[0]) / abs(xlim[1] - xlim[0])
+
+
+# 車種データの背景画像を ax に描く（キャリブレーション済みの extent, 表示の大きさに合った段）
+# xlim: 描いたあとに設定する表示範囲 -> AxesImage
+def show_background(ax, model_data, xlim=VIEW_XLIM, alpha=FADE_ALPHA):
+    levels = faded_levels(model_data["bg_image"], alpha)
+    extent = background_extent(model_data)
+    return ax.imshow(select_level(levels, display_width(ax, extent, xlim)), extent=extent, aspect='auto')
+
+
+# ズームしたとき: 今の表示範囲に合った段に差し替える（同じ段なら何もしない）
+def refresh_background(ax, image, model_data, alpha=FADE_ALPHA):
+    levels = faded_levels(model_data["bg_image"], alpha)
+    level = select_level(levels, display_width(ax, image.get_extent()))
+    if image.get_array().shape != level.shape:
+        image.set_data(level)
+
+
+if __name__ == "__main__":
+    import time
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import matplotlib.image as mpimg
+    from car_presets import CAR_MODELS, BG_EXTENT
+
+    def bench(f, n=20):
+        f()
+        times = []
+        for _ in range(n):
+            t0 = time.perf_counter()
+            f()
+            times.append(time.perf_counter() - t0)
+        return np.median(times) * 1000
+
+    fig, ax = plt.subplots(figsize=(10, 7))
+    for model, data in CAR_MODELS.items():
+        ax.clear()
+        old = ax.imshow(mpimg.imread(data["bg_image"]), extent=BG_EXTENT, aspect='auto', alpha=0.2)
+        new = show_background(ax, data)
+        ax.set_xlim(*VIEW_XLIM)
+        ax.set_ylim(-3, 8)
+        fig.canvas.draw()
+        renderer = fig.canvas.get_renderer()
+
+        load_old = bench(lambda: mpimg.imread(data["bg_image"]))
+        load_new = bench(lambda: (background_extent(data), faded_levels(data["bg_image"])))
+        draw_old = bench(lambda: old.draw(renderer))
+        draw_new = bench(lambda: new.draw(renderer))
+        shape = new.get_array().shape
+        print(f"{model}: 読み込み {load_old:.2f} -> {load_new:.3f} ms, 描画 {draw_old:.1f} -> {draw_new:.1f} ms"
+              f"（表示幅 {display_width(ax, new.get_extent()):.0f} px, {shape[1]}x{shape[0]} の段）")
+    plt.close(fig)
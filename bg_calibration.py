@@ -0,0 +1,216 @@
+import os
+import json
+import cv2
+import numpy as np
+
+from car_presets import CAR_MODELS, BG_EXTENT, TIRE_RADIUS
+
+# === 設定 ===
+OUTPUT_DIR = "bg_calibration"
+HOUGH_DP = 1.5            # HoughCircles（HOUGH_GRADIENT_ALT）の投票の解像度
+HOUGH_PERFECT = 0.8       # 円らしさのしきい値（0〜1、ホイールの同心円だけが残る程度）
+WHEEL_RADIUS = (0.03, 0.15)   # 探す円の半径の範囲（画像の幅に対する割合）
+CONCENTRIC_TOL = 0.02     # 中心がこれ以内（画像の幅に対する割合）の円は同じホイールとみなす
+MIN_WHEELBASE = 0.4       # 前後のホイールの中心の最小間隔（画像の幅に対する割合）
+PYRAMID_MIN = 128         # 画像ピラミッドの最小の大きさ（長い辺の画素数）
+
+
+def detection_cache_path(image_path):
+    return image_path + ".calibration.cache.json"
+
+
+def pyramid_cache_path(image_path):
+    return image_path + ".pyramid.cache.npz"
+
+
+# === ホイールの検出 ===
+# HOUGH_GRADIENT_ALT で円を検出し、中心の近い円（タイヤ・リム・ハブ・フェンダーの同心円）をまとめる
+# 同心円の多い2つのまとまり（十分に左右に離れたもの）を前後のホイールとする
+# -> [[cx, cy, r], [cx, cy, r]]（画素座標, r はまとまりの中で一番大きい円, 前 = 左が先）
+def detect_wheels(img):
+    h, w = img.shape[:2]
+    gray = cv2.GaussianBlur(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY), (5, 5), 1.5)
+    circles = cv2.HoughCircles(gray, cv2.HOUGH_GRADIENT_ALT, dp=HOUGH_DP, minDist=w // 50, param1=100,
+                               param2=HOUGH_PERFECT, minRadius=int(WHEEL_RADIUS[0] * w),
+                               maxRadius=int(WHEEL_RADIUS[1] * w))
+    if circles is None:
+        raise ValueError("ホイールが見つかりません")
+    circles = circles.reshape(-1, 3)
+    circles = circles[circles[:, 1] > 0.5 * h]
+
+    clusters = []
+    for c in circles:
+        for cl in clusters:
+            if np.hypot(*(np.mean(cl, axis=0)[:2] - c[:2])) < CONCENTRIC_TOL * w:
+                cl.append(c)
+                break
+        else:
+            clusters.append([c])
+    wheels = [[*np.mean(cl, axis=0)[:2], max(c[2] for c in cl)] for cl in clusters]
+    order = np.argsort([-len(cl) for cl in clusters], kind="stable")
+
+    for i in order:
+        for j in order:
+            if abs(wheels[i][0] - wheels[j][0]) >= MIN_WHEELBASE * w:
+                return np.array(sorted([wheels[i], wheels[j]], key=lambda c: c[0]))
+    raise ValueError("前後のホイールが見つかりません")
+
+
+# === 接地線（車体の下端の水平線）の検出 ===
+# Canny + HoughLinesP で、前後のホイールの間にある水平な線分のうち、
+# ホイールの中心より下・ホイールの外周より上で一番下のもの -> y（画素座標）、見つからなければ None
+def detect_ground(img, wheels):
+    (x0, y0, r0), (x1, y1, r1) = wheels
+    edges = cv2.Canny(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY), 50, 150)
+    lines = cv2.HoughLinesP(edges, 1, np.pi / 180, threshold=40,
+                            minLineLength=int(0.3 * (x1 - x0)), maxLineGap=5)
+    if lines is None:
+        return None
+    L = lines.reshape(-1, 4).astype(float)
+    y = 0.5 * (L[:, 1] + L[:, 3])
+    ok = ((np.abs(L[:, 3] - L[:, 1]) <= 2) & (L[:, [0, 2]].min(axis=1) > x0 - r0)
+          & (L[:, [0, 2]].max(axis=1) < x1 + r1) & (y > max(y0, y1)) & (y < min(y0 + r0, y1 + r1)))
+    return float(y[ok].max()) if ok.any() else None
+
+
+# 画像から目印（ホイールの中心・半径、接地線）を検出（画像の更新時刻・サイズが同じならファイルから読む）
+def detect_landmarks(image_path, use_cache=True):
+    stat = os.stat(image_path)
+    key = [stat.st_mtime_ns, stat.st_size]
+    cache_file = detection_cache_path(image_path)
+
+    if use_cache and os.path.exists(cache_file):
+        try:
+            with open(cache_file, encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached["key"] == key:
+                return cached["landmarks"]
+        except Exception:
+            pass
+
+    img = cv2.imread(image_path)
+    if img is None:
+        raise FileNotFoundError(f"画像を読み込めません: {image_path}")
+    wheels = detect_wheels(img)
+    landmarks = {
+        "size": list(img.shape[:2]),
+        "wheels": wheels.tolist(),
+        "ground": detect_ground(img, wheels),
+    }
+    if use_cache:
+        try:
+            with open(cache_file, "w", encoding="utf-8") as f:
+                json.dump({"key": key, "landmarks": landmarks}, f)
+        except OSError as e:
+            print(f"キャリブレーション結果を保存できませんでした: {e}")
+    return landmarks
+
+
+# === 画像 -> エディタの座標の変換 ===
+# x = a u + b, y = -k a v + d（u, v は画素の端を 0 とする座標）
+# 縦横比 k は BG_EXTENT で表示したときと同じにする（プリセットはその表示でなぞって作ってあるので、
+# 縦だけ伸び縮みさせると車体の上側がずれる）
+# a, b はホイールの中心2点を tire_coords の x に合わせて決め、d はホイールの中心（-> tire_coords の y）と
+# 車体の下端の線（-> ground_line の y）の y のずれの二乗和が最小になるように決める
+# -> imshow の extent [左, 右, 下, 上] と、目印の y のずれ（RMS）
+def calibrate_extent(landmarks, tire_coords, ground_line):
+    h, w = landmarks["size"]
+    wheels = np.array(landmarks["wheels"], dtype=float)
+    tires = np.array(tire_coords, dtype=float)[[0, -1]]
+    u, v = wheels[:, 0] + 0.5, wheels[:, 1] + 0.5
+
+    a = (tires[1, 0] - tires[0, 0]) / (u[1] - u[0])
+    b = tires[0, 0] - a * u[0]
+    k = ((BG_EXTENT[3] - BG_EXTENT[2]) / h) / ((BG_EXTENT[1] - BG_EXTENT[0]) / w)
+    c = -k * a
+
+    rows, targets = v, tires[:, 1]
+    if landmarks["ground"] is not None:
+        rows = np.append(rows, landmarks["ground"] + 0.5)
+        targets = np.append(targets, ground_line[2])
+    d = np.mean(targets - c * rows)
+    residual = float(np.sqrt(np.mean((c * rows + d - targets) ** 2)))
+    return [float(b), float(a * w + b), float(c * h + d), float(d)], residual
+
+
+# 車種データ（bg_image, tire_coords, ground_line）から背景画像の extent
+# 結果はメモリにも保持するので、同じ車種を読み込み直しても検出・計算はしない
+# 画像がない・ホイールが見つからない場合は従来の BG_EXTENT
+_extents = {}
+
+def background_extent(model_data):
+    key = (model_data.get("bg_image"), str(model_data.get("tire_coords")), str(model_data.get("ground_line")))
+    if key not in _extents:
+        try:
+            landmarks = detect_landmarks(model_data["bg_image"])
+            _extents[key] = calibrate_extent(landmarks, model_data["tire_coords"], model_data["ground_line"])[0]
+        except Exception as e:
+            print(f"背景画像のキャリブレーションに失敗しました（{model_data.get('bg_image')}）: {e}")
+            _extents[key] = list(BG_EXTENT)
+    return _extents[key]
+
+
+# === 画像ピラミッド（RGB, 1/2 ずつ縮小, 長い辺が PYRAMID_MIN 画素になるまで） ===
+# 縮小済みの各段をまとめて保存し、画像の更新時刻・サイズが同じなら読み込むだけにする
+def image_pyramid(image_path, use_cache=True):
+    stat = os.stat(image_path)
+    key = np.array([stat.st_mtime_ns, stat.st_size])
+    cache_file = pyramid_cache_path(image_path)
+
+    if use_cache and os.path.exists(cache_file):
+        try:
+            with np.load(cache_file, allow_pickle=False) as z:
+                if np.array_equal(z["key"], key):
+                    return [z[f"level{i}"] for i in range(int(z["n_levels"]))]
+        except Exception:
+            pass
+
+    img = cv2.imread(image_path)
+    if img is None:
+        raise FileNotFoundError(f"画像を読み込めません: {image_path}")
+    levels = [cv2.cvtColor(img, cv2.COLOR_BGR2RGB)]
+    while max(levels[-1].shape[:2]) >= 2 * PYRAMID_MIN:
+        levels.append(cv2.pyrDown(levels[-1]))
+    if use_cache:
+        try:
+            np.savez(cache_file, key=key, n_levels=len(levels),
+                     **{f"level{i}": level for i, level in enumerate(levels)})
+        except OSError as e:
+            print(f"画像ピラミッドを保存できませんでした: {e}")
+    return levels
+
+
+if __name__ == "__main__":
+    import time
+    import matplotlib.pyplot as plt
+    from matplotlib.patches import Circle
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    for model, data in CAR_MODELS.items():
+        t0 = time.perf_counter()
+        landmarks = detect_landmarks(data["bg_image"], use_cache=False)
+        extent, residual = calibrate_extent(landmarks, data["tire_coords"], data["ground_line"])
+        dt = (time.perf_counter() - t0) * 1000
+        levels = image_pyramid(data["bg_image"])
+        background_extent(data)
+        t0 = time.perf_counter()
+        background_extent(data)
+        dt_cached = (time.perf_counter() - t0) * 1e6
+        print(f"{model}: extent {np.round(extent, 2).tolist()}  目印のずれ {residual:.3f}  "
+              f"接地線 {'あり' if landmarks['ground'] is not None else 'なし'}  "
+              f"検出 {dt:.0f} ms / 読み込み済み {dt_cached:.1f} µs  ピラミッド {[l.shape[1] for l in levels]}")
+
+        fig, axes = plt.subplots(1, 2, figsize=(14, 5))
+        for ax, ext, title in zip(axes, [BG_EXTENT, extent], ["BG_EXTENT", "calibrated"]):
+            ax.imshow(levels[0], extent=ext, aspect='auto', alpha=0.4)
+            for (x, y) in data["tire_coords"]:
+                ax.add_patch(Circle((x, y), TIRE_RADIUS, fill=False, color='tab:red', linewidth=2))
+            x0, x1, y = data["ground_line"]
+            ax.plot([x0, x1], [y, y], color='tab:red', linewidth=1)
+            ax.set_xlim(-3, 13)
+            ax.set_ylim(-3, 8)
+            ax.set_aspect('equal')
+            ax.set_title(f"{title}: {np.round(ext, 2).tolist()}")
+        plt.savefig(os.path.join(OUTPUT_DIR, f"{model}_calibration.png"), bbox_inches='tight')
+        plt.close(fig)
+    print(f"\n保存先: {os.path.abspath(OUTPUT_DIR)}")
@@ -0,0 +1,108 @@
+import numpy as np
+
+# === 車種プリセット（app3.py の CAR_MODELS と同じ値） ===
+# スプレッドシート上の車種名は normalize_model_name() で下記のキーにそろえる
+CAR_MODELS = {
+    "軽自動車": {
+        "ctrlpts": [[-0.5, 0], [-0.5, 2.0], [-0.2, 2.65], [1.5, 3.0],
+                    [2.6, 4.75], [3.5, 5.1], [6.5, 5.1], [9.2, 5.1],
+                    [9.8, 4.5], [9.88, 1.75], [10.1, 1.58], [10.0, 0]],
+        "weights": [1.0, 2.0, 2.0, 5.0, 5.0, 2.0, 1.0, 7.0,
+                    12.5, 1.0, 1.0, 1.0],
+        "tire_coords": [(0.85, 0.1), (8.5, 0.1)],
+        "ground_line": [-0.5, 10.0, 0.0],
+        "bg_image": "Kei_car.jpg"
+    },
+    "コンパクトカー": {
+        "ctrlpts": [[-0.6, -0.2], [-0.8, 2.0], [0.6, 3.2], [1.9, 3.4],
+                    [3.8, 4.6], [6.6, 4.9], [10.0, 4.6], [9.8, 3.9],
+                    [10.3, 2.0], [10.6, 1.2], [10.3, -0.2]],
+        "weights": [1.0, 6.0, 3.0, 5.0, 5.0, 6.0, 5.0, 3.0, 2.0, 1.0, 1.0],
+        "tire_coords": [(0.85, -0.2), (8.8, -0.2)],
+        "ground_line": [-0.6, 10.3, -0.2],
+        "bg_image": "compact_car.jpg"
+    },
+    "SUV": {
+        "ctrlpts": [[-0.1, -0.5], [-0.15, 1.8], [0.8, 2.3], [2.8, 2.7],
+                    [4.4, 4.2], [7.0, 4.45], [9.7, 4.0], [9.35, 3.4],
+                    [10.0, 2.4], [10.0, 0.2], [9.8, -0.6], [9.2, -0.5]],
+        "weights": [1.0, 5.0, 1.8, 4.4, 10.0, 6.0, 15.0,
+                    18.5, 28.8, 28.8, 22.5, 10.0],
+        "tire_coords": [(1.8, -0.5), (8.1, -0.5)],
+        "ground_line": [-0.1, 9.2, -0.5],
+        "bg_image": "SUV.jpg"
+    },
+    "セダン": {
+        "ctrlpts": [[-0.4, 0.6], [-0.2, 2.1], [1.2, 2.8], [2.4, 2.9],
+                    [4.0, 4.0], [7.2, 4.0], [9.0, 3.1], [10.2, 3.0],
+                    [10.2, 2.2], [10.35, 1.6], [10.2, 0.6]],
+        "weights": [1.0, 14.6, 20.2, 91.8, 100.0, 100.0,
+                    100.0, 100.0, 14.3, 15.0, 1.0],
+        "tire_coords": [(1.6, 1.0), (8.2, 1.0)],
+        "ground_line": [-0.4, 10.2, 0.6],
+        "bg_image": "sedan2.jpg"
+    },
+    "ミニバン": {
+        "ctrlpts": [[-0.5, 0], [-0.4, 2.0], [0, 2.5], [1.4, 2.9],
+                    [3.7, 5.0], [6.5, 5.0], [10.1, 5.0], [9.8, 4.6],
+                    [10.2, 2.9], [10.1, 1.5], [10.1, 0]],
+        "weights": [1.0, 9.1, 15.1, 30.2, 52.9, 15.1,
+                    56.2, 17.8, 12.0, 11.8, 1.0],
+        "tire_coords": [(1.6, 0.2), (8.3, 0.2)],
+        "ground_line": [-0.5, 10.1, 0],
+        "bg_image": "Minivan.jpg"
+    },
+    "クーペ": {
+        "ctrlpts": [[0, 0.8], [0.1, 2.25], [0.8, 2.7], [3.4, 3.2],
+                    [4.6, 3.85], [6.0, 4.0], [7.2, 3.7],
+                    [8.4, 3.5], [9.4, 3.0], [9.8, 2.0], [9.5, 0.8]],
+        "weights": [1.0, 9.1, 15.1, 30.2, 52.9, 30.0,
+                    56.2, 20.0, 17.8, 11.8, 1.0],
+        "tire_coords": [(1.8, 1.0), (8.0, 1.0)],
+        "ground_line": [0, 9.4, 0.8],
+        "bg_image": "coope.jpg"
+    }
+}
+
+TIRE_RADIUS = 0.9
+
+# 背景画像（bg_image）を表示する座標範囲（各エディタの imshow の extent と同じ）
+BG_EXTENT = [-1, 11, -1.5, 6]
+
+# スライダーの範囲（位置: 初期値 ±1、重み: 0.1〜150）
+POS_RANGE = 1.0
+WEIGHT_MIN = 0.1
+WEIGHT_MAX = 150.0
+
+
+# 車種名の正規化（"ミニバン(Minivan)" -> "ミニバン" など）
+def normalize_model_name(m):
+    m = str(m)
+    if "Light" in m or "軽" in m: return "軽自動車"
+    elif "Compact" in m or "コンパクト" in m: return "コンパクトカー"
+    elif "SUV" in m: return "SUV"
+    elif "Sedan" in m or "セダン" in m: return "セダン"
+    elif "Minivan" in m or "ミニバン" in m: return "ミニバン"
+    elif "Coupe" in m or "coupe" in m or "クー" in m: return "クーペ"
+    return "UnknownModel"
+
+
+# 形状を車種ごとの正規化ベクトルに変換
+# 位置: (制御点 - 初期値) / POS_RANGE -> [-1, 1]、重み: log スケールで [0, 1]
+# ctrlpts: (..., n, 2), weights: (..., n) -> (..., 3n)（複数形状をまとめて変換できる）
+def normalize_shape(model, ctrlpts, weights):
+    base = np.asarray(CAR_MODELS[model]["ctrlpts"], dtype=float)
+    pos = (np.asarray(ctrlpts, dtype=float) - base) / POS_RANGE
+    w = np.clip(np.asarray(weights, dtype=float), WEIGHT_MIN, WEIGHT_MAX)
+    w_norm = np.log(w / WEIGHT_MIN) / np.log(WEIGHT_MAX / WEIGHT_MIN)
+    return np.concatenate([pos.reshape(pos.shape[:-2] + (-1,)), w_norm], axis=-1)
+
+
+# normalize_shape の逆変換（ctrlpts, weights を返す。vec: (..., 3n) も可）
+def denormalize_shape(model, vec):
+    base = np.asarray(CAR_MODELS[model]["ctrlpts"], dtype=float)
+    n = len(base)
+    vec = np.asarray(vec, dtype=float)
+    ctrlpts = base + POS_RANGE * vec[..., :2 * n].reshape(vec.shape[:-1] + (n, 2))
+    weights = WEIGHT_MIN * (WEIGHT_MAX / WEIGHT_MIN) ** vec[..., 2 * n:]
+    return ctrlpts, weights
@@ -1,16 +1,15 @@
-import pandas as pd
+from workbook_loader import file_path, column_map, load_workbook
 
-# Excelファイルのパス
-file_path = "判定済みデータ.xlsx"  # ファイル名が違う場合は変更してください
-
-# Excelファイルを読み込み
-xls = pd.ExcelFile(file_path)
-sheet_names = xls.sheet_names
+# Excelファイルを読み込み（全シートを一度に。2回目以降はスナップショットから）
+sheets = load_workbook(file_path, normalize=False)
 
 # 各シートの列名を表示
-for sheet in sheet_names:
-    df = pd.read_excel(file_path, sheet_name=sheet)
-    df.columns = df.columns.str.strip()  # 空白を除去
-
+for sheet, df in sheets.items():
     print(f"\n📄 {sheet} の列名一覧:")
     print(list(df.columns))
+
+    # 列マップにあるのにシートに無い列
+    if sheet in column_map:
+        missing = [name for name in column_map[sheet].values() if name not in df.columns]
+        if missing:
+            print(f"⚠️ 列マップの列が見つかりません: {missing}")
@@ -0,0 +1,197 @@
+import os
+import cv2
+import numpy as np
+from scipy.optimize import least_squares
+
+from car_presets import CAR_MODELS, BG_EXTENT, WEIGHT_MIN, WEIGHT_MAX
+from nurbs_basis import DELTA, basis_matrix, evaluate_curve, curve_jacobian, resample_curves, sample_params
+from shape_constraints import polyline_distance
+from bg_calibration import background_extent
+
+# === 設定 ===
+OUTPUT_DIR = "contour_fits"
+BG_TOL = 8            # 背景色（画像の縁の画素の中央値）からこれ以上離れた画素を車体とみなす
+CANNY_LOW = 30        # 薄い色の車体でも輪郭が切れないように Canny のエッジも加える
+CANNY_HIGH = 90
+CLOSE_FRAC = 0.01     # 輪郭の切れ目をふさぐクロージングの大きさ（画像の幅に対する割合）
+CUT_FRAC = 0.15       # 接地線の高さの目安（輪郭の最下点から高さのこの割合、車種を指定しない場合）
+N_TARGET = 400        # 当てはめに使う輪郭の点数（弧長で等間隔）
+MAX_NFEV = 50         # 重みの調整の反復回数の上限
+SMOOTH = 1e-4         # 制御点の並び（制御多角形）の2階差分へのペナルティ（制御点が絡まないように）
+
+
+# === 画像から車体の外形を取り出す ===
+# 背景色との差 + Canny のエッジ -> クロージング -> 一番大きい外側の輪郭
+# image: ファイル名または BGR の配列 -> 輪郭の画素座標 (点数, 2), 画像の (高さ, 幅)
+def contour_pixels(image):
+    img = cv2.imread(image) if isinstance(image, str) else np.asarray(image)
+    if img is None:
+        raise FileNotFoundError(f"画像を読み込めません: {image}")
+    if img.ndim == 2:
+        img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+    h, w = img.shape[:2]
+    border = np.concatenate([img[0], img[-1], img[:, 0], img[:, -1]])
+    diff = np.abs(img.astype(np.int16) - np.median(border, axis=0)).max(axis=2)
+    mask = np.where(diff > BG_TOL, 255, 0).astype(np.uint8)
+    mask |= cv2.Canny(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY), CANNY_LOW, CANNY_HIGH)
+    k = max(3, int(w * CLOSE_FRAC)) | 1
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, np.ones((k, k), np.uint8))
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+    if not contours:
+        raise ValueError(f"車体の輪郭が見つかりません: {image}")
+    return max(contours, key=cv2.contourArea)[:, 0, :].astype(float), (h, w)
+
+
+# 画素座標 -> エディタの座標（imshow(..., extent=extent) で表示したときの位置, 画像の上が y の大きい側）
+def pixel_to_world(pixels, image_shape, extent=BG_EXTENT):
+    h, w = image_shape
+    x0, x1, y0, y1 = extent
+    pixels = np.asarray(pixels, dtype=float)
+    x = x0 + (pixels[..., 0] + 0.5) / w * (x1 - x0)
+    y = y1 - (pixels[..., 1] + 0.5) / h * (y1 - y0)
+    return np.stack([x, y], axis=-1)
+
+
+# 閉じた外形から、cut_y より上の部分（車の前の下端 -> 屋根 -> 後ろの下端）を取り出す
+# 曲線は始点が前（左）になる向きにそろえる（プリセットの ctrlpts と同じ）
+def upper_profile(outline, cut_y):
+    outline = np.asarray(outline, dtype=float)
+    above = outline[:, 1] >= cut_y
+    below = np.flatnonzero(~above)
+    if len(below) == 0 or not above.any():
+        raise ValueError(f"cut_y={cut_y:.2f} で輪郭を上下に分けられません")
+    outline = np.roll(outline, -below[0], axis=0)
+    above = np.roll(above, -below[0])
+    # above の連続区間のうち一番長いもの
+    edges = np.diff(above.astype(int))
+    starts = np.flatnonzero(edges == 1) + 1
+    ends = np.flatnonzero(edges == -1) + 1
+    if len(ends) < len(starts):
+        ends = np.append(ends, len(above))
+    i = np.argmax(ends - starts)
+    profile = outline[starts[i]:ends[i]]
+    return profile if profile[0, 0] <= profile[-1, 0] else profile[::-1]
+
+
+# === 輪郭への当てはめ ===
+# 1) 重み 1 のまま、弧長で等間隔に並べた輪郭の点に対して制御点を線形最小二乗（キャッシュした基底で1回解くだけ）
+#    両端の制御点は輪郭の端点に固定する（クランプしたノットなので曲線の端点になる）
+# 2) 制御点（両端以外）と log 重み（先頭以外、重みは定数倍しても同じ曲線なので先頭は 1）を
+#    最近傍点の対応で least_squares（ヤコビアンは curve_jacobian の解析微分）
+#    残差は 曲線 -> 輪郭 と 輪郭 -> 曲線 の両方向（片方だけだと曲線が輪郭の一部に縮む）
+# profile: (点数, 2) -> ctrlpts (n, 2), weights (n,)
+def fit_profile(profile, n_ctrlpts, smooth=SMOOTH, max_nfev=MAX_NFEV, delta=DELTA):
+    n = n_ctrlpts
+    m = len(sample_params(delta))
+    target = resample_curves(np.asarray(profile, dtype=float)[None], N_TARGET)[0]
+    start = resample_curves(target[None], m)[0]
+
+    N = basis_matrix(n, 3, delta)
+    P = np.empty((n, 2))
+    P[0], P[-1] = start[0], start[-1]
+    # 2階差分 D P（両端の固定分は右辺へ）も同じ最小二乗に加える
+    D = np.diff(np.eye(n), 2, axis=0) * np.sqrt(smooth * m)
+    A = np.vstack([N, D])
+    rhs = np.vstack([start, np.zeros((n - 2, 2))]) - A[:, :1] @ P[:1] - A[:, -1:] @ P[-1:]
+    P[1:-1] = np.linalg.lstsq(A[:, 1:-1], rhs, rcond=None)[0]
+
+    scale = np.sqrt(m / N_TARGET)   # 2つの方向の残差の点数の違いをそろえる
+
+    def unpack(theta):
+        ctrlpts = P.copy()
+        ctrlpts[1:-1] = theta[:2 * (n - 2)].reshape(n - 2, 2)
+        weights = np.exp(np.concatenate([[0.0], theta[2 * (n - 2):]]))
+        return ctrlpts, weights
+
+    def nearest(ctrlpts, weights):
+        C = evaluate_curve(ctrlpts, weights, delta)
+        d2 = np.sum((C[:, None, :] - target[None, :, :]) ** 2, axis=2)
+        return C, d2.argmin(axis=1), d2.argmin(axis=0)
+
+    def residuals(theta):
+        ctrlpts, weights = unpack(theta)
+        C, to_target, to_curve = nearest(ctrlpts, weights)
+        return np.concatenate([(C - target[to_target]).ravel(), scale * (target - C[to_curve]).ravel(),
+                               (D @ ctrlpts).ravel()])
+
+    def jacobian(theta):
+        ctrlpts, weights = unpack(theta)
+        _, _, to_curve = nearest(ctrlpts, weights)
+        R, dC_dw = curve_jacobian(ctrlpts, weights, delta)
+        # dC/dθ (サンプル数, 2, 変数の数)
+        J = np.zeros((m, 2, 2 * (n - 2) + n - 1))
+        for d in range(2):
+            J[:, d, d:2 * (n - 2):2] = R[:, 1:-1]
+        J[:, :, 2 * (n - 2):] = np.transpose(dC_dw[:, 1:, :] * weights[1:, None], (0, 2, 1))
+        Js = np.zeros((n - 2, 2, J.shape[2]))
+        for d in range(2):
+            Js[:, d, d:2 * (n - 2):2] = D[:, 1:-1]
+        return np.vstack([J.reshape(2 * m, -1), -scale * J[to_curve].reshape(2 * N_TARGET, -1),
+                          Js.reshape(2 * (n - 2), -1)])
+
+    lo, hi = np.log(WEIGHT_MIN), np.log(WEIGHT_MAX)
+    theta0 = np.concatenate([P[1:-1].ravel(), np.zeros(n - 1)])
+    bounds = (np.concatenate([np.full(2 * (n - 2), -np.inf), np.full(n - 1, lo)]),
+              np.concatenate([np.full(2 * (n - 2), np.inf), np.full(n - 1, hi)]))
+    res = least_squares(residuals, theta0, jac=jacobian, bounds=bounds, max_nfev=max_nfev)
+    return unpack(res.x)
+
+
+# 当てはめの誤差: 輪郭の各点から曲線（折れ線）までの距離の (RMS, 最大)
+def fit_error(ctrlpts, weights, profile):
+    d = polyline_distance(evaluate_curve(ctrlpts, weights, 0.001), profile)
+    return float(np.sqrt(np.mean(d**2))), float(d.max())
+
+
+# 画像から形状を作る（新しい車種を写真から追加する用）
+# cut_y: 接地線の高さ（None なら輪郭の高さの CUT_FRAC）-> ctrlpts, weights（リスト）, 輪郭
+def fit_image(image, n_ctrlpts=12, cut_y=None, extent=BG_EXTENT):
+    pixels, shape = contour_pixels(image)
+    outline = pixel_to_world(pixels, shape, extent)
+    if cut_y is None:
+        y = outline[:, 1]
+        cut_y = y.min() + CUT_FRAC * (y.max() - y.min())
+    profile = upper_profile(outline, cut_y)
+    ctrlpts, weights = fit_profile(profile, n_ctrlpts)
+    return ctrlpts.tolist(), weights.tolist(), profile
+
+
+# 既存の車種の背景画像に当てはめる（制御点数と接地線はプリセットと同じ）
+# 画像はエディタと同じキャリブレーション済みの extent で座標に変換する（表示される写真と重なるように）
+def fit_model(model, n_ctrlpts=None):
+    data = CAR_MODELS[model]
+    if n_ctrlpts is None:
+        n_ctrlpts = len(data["ctrlpts"])
+    return fit_image(data["bg_image"], n_ctrlpts, cut_y=data["ground_line"][2], extent=background_extent(data))
+
+
+if __name__ == "__main__":
+    import time
+    import matplotlib.pyplot as plt
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    for model, data in CAR_MODELS.items():
+        t0 = time.perf_counter()
+        ctrlpts, weights, profile = fit_model(model)
+        dt = (time.perf_counter() - t0) * 1000
+        rms, worst = fit_error(ctrlpts, weights, profile)
+        rms0, worst0 = fit_error(data["ctrlpts"], data["weights"], profile)
+        print(f"{model}: 誤差 RMS {rms:.3f} / 最大 {worst:.3f}（プリセット RMS {rms0:.3f} / 最大 {worst0:.3f}）, {dt:.0f} ms")
+        print(f"  \"ctrlpts\": {np.round(ctrlpts, 2).tolist()},")
+        print(f"  \"weights\": {np.round(weights, 1).tolist()},")
+
+        fig, ax = plt.subplots(figsize=(8, 5))
+        ax.imshow(plt.imread(data["bg_image"]), extent=background_extent(data), aspect='auto', alpha=0.4)
+        ax.plot(profile[:, 0], profile[:, 1], color='tab:orange', linewidth=3, label="contour")
+        curve = evaluate_curve(data["ctrlpts"], data["weights"])
+        ax.plot(curve[:, 0], curve[:, 1], color='gray', linestyle='--', label="preset")
+        curve = evaluate_curve(ctrlpts, weights)
+        ax.plot(curve[:, 0], curve[:, 1], color='tab:blue', label="fit")
+        ax.plot(*np.array(ctrlpts).T, 'o--', color='tab:blue', markersize=3, linewidth=0.5)
+        ax.set_xlim(-3, 13)
+        ax.set_ylim(-3, 8)
+        ax.set_aspect('equal')
+        ax.legend(loc='upper right')
+        plt.savefig(os.path.join(OUTPUT_DIR, f"{model}_fit.png"), bbox_inches='tight')
+        plt.close(fig)
+    print(f"\n保存先: {os.path.abspath(OUTPUT_DIR)}")
@@ -1,64 +1,128 @@
+import json
+import time
+import numpy as np
 import pandas as pd
 from scipy.stats import zscore
+from concurrent.futures import ProcessPoolExecutor
 
-# Excelファイル名
-file_path = "判定済みデータ.xlsx"
-xls = pd.ExcelFile(file_path)
-sheet_names = xls.sheet_names
+from workbook_loader import file_path, column_map, standard_columns, load_workbook
 
-# シートごとの列名対応辞書 
-column_map = {
-    "Pattern1": {"amps": "Amps", "lower": "区間の下限値", "upper": "区間の上限値", "center": "中心値", "judge": "判定"},
-    "Pattern2": {"amps": "Amp",  "lower": "区間の下限値", "upper": "区間の上限値", "center": "中心値", "judge": "判定"},
-    "Pattern3": {"amps": "Amps", "lower": "区間の下限値", "upper": "区間の上限値", "center": "中心値", "judge": "判定"},
-    "Pattern4": {"amps": "Amps", "lower": "区間の下限値", "upper": "区間の上限値", "center": "中心値", "judge": "判定"},
-}
+# 結果の出力先
+RESULT_CSV = "outlier_results.csv"
+RESULT_PARQUET = "outlier_results.parquet"
+TIMING_CSV = "outlier_timings.csv"
+MAX_WORKERS = None  # None: CPU コア数
 
-# 結果の格納リスト
-all_results = []
 
-# 各シート処理 
-for sheet in sheet_names:
-    print(f"\n=== {sheet} の処理開始 ===")
+# 1シート分の異常値検出
+# Amps 列を一度だけソートし、区間 [下限, 上限) の該当データを searchsorted で取り出す
+# 同じ区間の z-score は一度だけ計算して使い回す
+def find_interval_outliers(df, cols, sheet):
+    results = []
 
-    df = pd.read_excel(file_path, sheet_name=sheet)
-    df.columns = df.columns.str.strip() # 空白除去
+    amps = df[cols["amps"]].to_numpy()
+    order = np.argsort(amps, kind="stable")
+    amps_sorted = amps[order]
 
-    if sheet not in column_map:
-        print(f"{sheet} は列マップが未定義のためスキップします")
-        continue
+    judge = df[cols["judge"]].to_numpy()
+    target = pd.notna(judge) & (judge != "正常")
+    lowers = df[cols["lower"]].to_numpy()[target]
+    uppers = df[cols["upper"]].to_numpy()[target]
+    centers = df[cols["center"]].to_numpy()[target]
 
-    cols = column_map[sheet]
-    try:
-        for _, row in df.iterrows():
-            # NaN 判定回避と正常行のスキップ
-            if pd.notna(row[cols["judge"]]) and row[cols["judge"]] != "正常":
-                lower = row[cols["lower"]]
-                upper = row[cols["upper"]]
-
-                amps_in_range = df[(df[cols["amps"]] >= lower) & (df[cols["amps"]] < upper)][cols["amps"]]
-
-                if len(amps_in_range) >= 3:
+    cache = {}
+    for lower, upper, center, jd in zip(lowers, uppers, centers, judge[target]):
+        key = (lower, upper)
+        if key not in cache:
+            outliers = None
+            if pd.notna(lower) and pd.notna(upper):
+                lo = np.searchsorted(amps_sorted, lower, side="left")
+                hi = np.searchsorted(amps_sorted, upper, side="left")
+                if hi - lo >= 3:
+                    # 元の行順に戻してから z-score（従来の出力と同じ順序・値）
+                    amps_in_range = pd.Series(amps[np.sort(order[lo:hi])])
                     zs = zscore(amps_in_range)
                     outliers = amps_in_range[abs(zs) >= 2].drop_duplicates()
+            cache[key] = outliers
+
+        outliers = cache[key]
+        if outliers is not None and not outliers.empty:
+            results.append({
+                "シート": sheet,
+                "区間中心": center,
+                "判定": jd,
+                "異常値数": len(outliers),
+                "異常値一覧": list(outliers)
+            })
 
-                    if not outliers.empty:
-                        all_results.append({
-                            "シート": sheet,
-                            "区間中心": row[cols["center"]],
-                            "判定": row[cols["judge"]],
-                            "異常値数": len(outliers),
-                            "異常値一覧": list(outliers)
-                        })
+    return results
+
+
+# プロセスプール用: 1シート分を処理して (シート名, 結果, 行数, 処理時間, エラー) を返す
+def process_sheet(task):
+    sheet, df = task
+    t0 = time.perf_counter()
+    error = ""
+    results = []
+    try:
+        results = find_interval_outliers(df, standard_columns, sheet)
     except KeyError as e:
-        print(f"列名エラー: {e}")
+        error = f"列名エラー: {e}"
     except Exception as e:
-        print(f"その他のエラー: {e}")
+        error = f"その他のエラー: {e}"
+    return sheet, results, len(df), time.perf_counter() - t0, error
+
+
+# 結果を型付きの表にする（1行 = 1区間）
+def results_table(all_results):
+    table = pd.DataFrame({
+        "sheet": pd.Series([r["シート"] for r in all_results], dtype="string"),
+        "interval_center": pd.Series([r["区間中心"] for r in all_results], dtype="float64"),
+        "judgment": pd.Series([r["判定"] for r in all_results], dtype="string"),
+        "outlier_count": pd.Series([r["異常値数"] for r in all_results], dtype="int64"),
+        "values": pd.Series([[float(v) for v in r["異常値一覧"]] for r in all_results], dtype="object"),
+    })
+    return table
+
+
+def save_results(table, timings):
+    csv_table = table.assign(values=table["values"].map(json.dumps))
+    csv_table.to_csv(RESULT_CSV, index=False, encoding="utf-8-sig")
+    try:
+        table.to_parquet(RESULT_PARQUET, index=False)
+    except ImportError:
+        print("pyarrow が無いため Parquet の保存をスキップします")
+    timings.to_csv(TIMING_CSV, index=False, encoding="utf-8-sig")
+
+
+if __name__ == "__main__":
+    # 全シートを一度に読み込み（2回目以降はスナップショットから）
+    sheets = load_workbook(file_path)
+
+    tasks = []
+    for sheet, df in sheets.items():
+        if sheet not in column_map:
+            print(f"{sheet} は列マップが未定義のためスキップします")
+            continue
+        tasks.append((sheet, df))
 
-# 出力
-print("\n【異常値検出結果（全シート）】")
-for r in all_results:
-    print(f"{r['シート']} | 区間中心 = {r['区間中心']:.3f} | 判定 = {r['判定']} | 異常値数 = {r['異常値数']}")
-    print("  異常値:", r['異常値一覧'])
+    # 各シートをプロセスプールで並列処理
+    all_results = []
+    timings = []
+    with ProcessPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        for sheet, results, n_rows, elapsed, error in ex.map(process_sheet, tasks):
+            print(f"\n=== {sheet}: {n_rows}行, {elapsed:.3f}秒 ===")
+            if error:
+                print(error)
+            all_results.extend(results)
+            timings.append({"sheet": sheet, "rows": n_rows, "seconds": elapsed,
+                            "intervals": len(results), "error": error})
 
+    # 出力
+    print("\n【異常値検出結果（全シート）】")
+    for r in all_results:
+        print(f"{r['シート']} | 区間中心 = {r['区間中心']:.3f} | 判定 = {r['判定']} | 異常値数 = {r['異常値数']}")
+        print("  異常値:", r['異常値一覧'])
 
+    save_results(results_table(all_results), pd.DataFrame(timings))
+    print(f"\n結果を保存しました: {RESULT_CSV}, {RESULT_PARQUET}, {TIMING_CSV}")
@@ -4,9 +4,10 @@
 
 import os
 import csv
-import copy
 import numpy as np
 import random
+from scipy.linalg import cho_factor, cho_solve, cholesky, solve_triangular
+from concurrent.futures import ThreadPoolExecutor
 
 #############################################
 #  Class Parameter
@@ -53,85 +54,255 @@ class InputData:
         self.maxlist=np.array([])
         self.salist=np.array([])
         
-def readInputFile(filePath, param,data):
-    file = open(filePath, 'r')
-    fr = csv.reader(file)
-    #inputd=[]
-    line=next(fr)
-    param.nd=int(line[0])
-    print(param.nd)
-    aa=0
-    for i in range(param.nd):
-        line=next(fr)
-        if aa==0:
-            param.nv=len(line)-1
-            aa=1
-        d=[]
-        for j in range(param.nv):
-            d=np.append(d,float(line[j]))
-        data.var_list=np.append(data.var_list,d)
-        data.func_list=np.append(data.func_list,float(line[param.nv]))
-        print(data.func_list)
-    data.var_list=np.reshape(data.var_list,[param.nd,param.nv])
-    print(data.var_list)
-    print(data.func_list)
+def readInputFile(filePath, param,data,chunk=100000,memmap_dir=None):
+    # first line: number of data, following lines: nv variables + 1 function value
+    # rows are parsed in chunks into preallocated arrays (linear time);
+    # with memmap_dir the arrays are .npy memory maps instead of RAM
+    with open(filePath, 'r') as file:
+        fr = csv.reader(file)
+        line=next(fr,None)
+        if not line:
+            raise ValueError(filePath+": empty file (number of data is missing)")
+        param.nd=int(line[0])
+        print(param.nd)
+        first=next(fr,None)
+        if param.nd<=0 or not first:
+            raise ValueError(filePath+": no data rows")
+        param.nv=len(first)-1
+        if memmap_dir is None:
+            table=np.empty((param.nd,param.nv+1))
+        else:
+            #one memmap file per input file, so loading another input does not overwrite it
+            os.makedirs(memmap_dir, exist_ok=True)
+            name=os.path.splitext(os.path.basename(filePath))[0]+".npy"
+            table=np.lib.format.open_memmap(os.path.join(memmap_dir,name),
+                mode='w+',dtype=np.float64,shape=(param.nd,param.nv+1))
+        table[0]=np.asarray(first[:param.nv+1],dtype=float)
+        n=1
+        rows=[]
+        for line in fr:
+            if n+len(rows)>=param.nd:
+                break
+            rows.append(line[:param.nv+1])
+            if len(rows)==chunk:
+                table[n:n+len(rows)]=np.asarray(rows,dtype=float)
+                n+=len(rows)
+                rows=[]
+        if rows:
+            table[n:n+len(rows)]=np.asarray(rows,dtype=float)
+            n+=len(rows)
+    if n<param.nd:
+        print("warning: "+str(param.nd)+" data declared but "+str(n)+" rows found")
+        param.nd=n
+        table=table[:n]
+    data.var_list=table[:,:param.nv]
+    data.func_list=table[:,param.nv]
+    print(data.var_list.shape)
+    print(data.func_list.shape)
 
-def RBF(x,c,r,Lambda,y):
-    nv=int(len(x[0]))
-    ndata=int(len(x))
-    nbasis=int(len(c))
-    w=[]
-    h=[]
-    a=[]
-    b=[]
-    for i in range(nbasis):
-        line=[]
-        for j in range(ndata):
-            dis=0.0
-            for k in range(nv):
-                dis+=float(-(x[j][k]-c[i][k])**2/r[k]**2)
-            line.append(np.exp(dis))
-        line=copy.deepcopy(line)
-        h.append(line)
-    h=np.array(h)
-    a=np.dot(h,h.T)    
-    for i in range(nbasis):
-        a[i][i]+=Lambda
-    b=np.linalg.inv(a)
-    a=np.dot(b,h)
-    w=np.dot(a,y)
-    w=copy.deepcopy(w)
-    print("inside RBF")
-    del a
-    del b
-    del line
-    del h
-    return w
-def calcrbf(x,w,c,r):
-    ndv=len(x)
+def kernelmatrix(x,c,r,chunk=None):
+    # h[i][j]=exp(-sum_k (x[j][k]-c[i][k])**2/r[k]**2)  (nbasis x ndata)
+    # distances are built by broadcasting, in blocks of data rows to bound memory
+    x=np.asarray(x,dtype=float)/np.asarray(r,dtype=float)
+    c=np.asarray(c,dtype=float)/np.asarray(r,dtype=float)
     nbasis=len(c)
-    func=0.0
-    for i in range(nbasis):
-        dis=0.0
-        for k in range(ndv):
-            dis+=((x[k]-c[i][k])/r[k])**2
-        func+=w[i]*np.exp(-dis)
-    return float(func)
-def errorestimate(x,y,w,c,r):
     ndata=len(x)
-    nbasis=len(c)
-    ndv=len(x[0])
-    err=0.0
-    for i in range(ndata):
-        func=calcrbf(x[i],w,c,r)
-        err+=(y[i]-func)**2
-    return err
+    if chunk is None:
+        chunk=max(1,4000000//max(1,nbasis*x.shape[1]))
+    h=np.empty((nbasis,ndata))
+    for s in range(0,ndata,chunk):
+        diff=c[:,None,:]-x[None,s:s+chunk,:]
+        h[:,s:s+chunk]=np.exp(-np.einsum('ijk,ijk->ij',diff,diff))
+    return h
+
+def RBF(x,c,r,Lambda,y,chunk=None):
+    # ridge solution w=(h h^T + Lambda I)^-1 h y via Cholesky factorization
+    h=kernelmatrix(x,c,r,chunk)
+    a=np.dot(h,h.T)
+    a[np.diag_indices_from(a)]+=Lambda
+    b=np.dot(h,np.asarray(y,dtype=float))
+    try:
+        w=cho_solve(cho_factor(a),b)
+    except np.linalg.LinAlgError:
+        #Lambda=0 with duplicated centers: matrix is only semi-definite
+        w=np.linalg.lstsq(a,b,rcond=None)[0]
+    return w
+def predict(X,w,c,r,chunk=None):
+    # evaluates any number of query points at once: f(X)=h(X)^T w
+    X=np.atleast_2d(np.asarray(X,dtype=float))
+    return np.dot(kernelmatrix(X,c,r,chunk).T,w)
+def predictgradient(X,w,c,r,chunk=None):
+    # analytic gradient df/dX of one function (w: nbasis), shape (nquery x nv)
+    X=np.atleast_2d(np.asarray(X,dtype=float))
+    c=np.asarray(c,dtype=float)
+    r=np.asarray(r,dtype=float)
+    phiw=kernelmatrix(X,c,r,chunk).T*np.asarray(w,dtype=float)
+    return -2.0*(X*phiw.sum(axis=1)[:,None]-np.dot(phiw,c))/r**2
+def calcrbf(x,w,c,r):
+    return float(predict(x,w,c,r)[0])
+def errorestimate(x,y,w,c,r,chunk=None):
+    res=np.asarray(y,dtype=float)-predict(x,w,c,r,chunk)
+    return float(np.dot(res,res))
 def distance(a,b,r):
-    ndv=len(a)
-    dis=0.0
-    for i in range(a):
-        dis+=((a[i]-b[i])/r[i])**2
-    return dis
+    return float(np.sum(((np.asarray(a,dtype=float)-np.asarray(b,dtype=float))/np.asarray(r,dtype=float))**2))
+
+def loocv(x,c,r,Lambda,y,chunk=None,h=None,gram=None):
+    # closed-form leave-one-out residuals of the ridge RBF (fixed centers):
+    # e_i=(y_i-yhat_i)/(1-S_ii), S=h^T (h h^T + Lambda I)^-1 h, from one Cholesky factorization
+    # gram=h h^T may be passed in when several Lambdas share the same h (it is not modified)
+    if h is None:
+        h=kernelmatrix(x,c,r,chunk)
+    y=np.asarray(y,dtype=float)
+    a=np.dot(h,h.T) if gram is None else gram.copy()
+    a[np.diag_indices_from(a)]+=Lambda
+    L=cholesky(a,lower=True)
+    v=solve_triangular(L,h,lower=True)
+    yhat=np.dot(v.T,np.dot(v,y))
+    s=np.einsum('ij,ij->j',v,v)
+    if y.ndim>1:
+        s=s[:,None]#several functions share the same hat matrix
+    with np.errstate(divide='ignore',invalid='ignore'):
+        e=(y-yhat)/(1.0-s)
+    return float(np.mean(e**2))
+
+def tunehyperparameters(x,c,y,radii,lambdas,workers=None,chunk=None):
+    # grid search over (radius, Lambda); radius is relative to each variable's data range
+    # candidates are scored in parallel; h and h h^T are built once per radius, one factorization per Lambda
+    x=np.asarray(x,dtype=float)
+    span=x.max(axis=0)-x.min(axis=0)
+    span[span==0]=1.0
+    def score(radius):
+        r=radius*span
+        h=kernelmatrix(x,c,r,chunk)
+        gram=np.dot(h,h.T)
+        out=[]
+        for Lambda in lambdas:
+            try:
+                err=loocv(x,c,r,Lambda,y,h=h,gram=gram)
+            except np.linalg.LinAlgError:
+                err=np.inf
+            out.append((radius,Lambda,err if np.isfinite(err) else np.inf))
+        return out
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        table=[row for rows in ex.map(score,radii) for row in rows]
+    best=min(table,key=lambda row:row[2])
+    return best,table
+
+def cholupdate(L,v,downdate=False):
+    # in-place rank-one update (or downdate) of lower L: L L^T +/- v v^T, O(n^2)
+    v=np.array(v,dtype=float)
+    n=len(v)
+    for k in range(n):
+        if downdate:
+            rr=L[k,k]**2-v[k]**2
+            if rr<=0.0:
+                raise np.linalg.LinAlgError("downdate makes the matrix indefinite")
+        else:
+            rr=L[k,k]**2+v[k]**2
+        rkk=np.sqrt(rr)
+        cc=rkk/L[k,k]
+        ss=v[k]/L[k,k]
+        L[k,k]=rkk
+        if k+1<n:
+            if downdate:
+                L[k+1:,k]=(L[k+1:,k]-ss*v[k+1:])/cc
+            else:
+                L[k+1:,k]=(L[k+1:,k]+ss*v[k+1:])/cc
+            v[k+1:]=cc*v[k+1:]-ss*L[k+1:,k]
+    return L
+
+#############################################
+#  Class for online RBF (incremental ridge solution)
+#############################################
+class OnlineRBF:
+    # keeps the Cholesky factor of a=h h^T + Lambda I and b=h y,
+    # so data points can be added/removed and centers added without refitting
+    def __init__(self,c,r,Lambda):
+        self.c=np.array(c,dtype=float)
+        self.r=np.asarray(r,dtype=float)
+        self.Lambda=float(Lambda)
+        nbasis=len(self.c)
+        #with Lambda<=0 the empty-data factor is singular: fit() must come first
+        self.L=np.sqrt(self.Lambda)*np.eye(nbasis) if self.Lambda>0.0 else None
+        self.b=np.zeros(nbasis)
+        self.x=np.empty((16,len(self.r)))
+        self.y=np.empty(16)
+        self.nd=0
+    #------------------------------------------------------
+    def fit(self,x,y):
+        # initial (batch) factorization
+        x=np.asarray(x,dtype=float)
+        y=np.asarray(y,dtype=float)
+        h=kernelmatrix(x,self.c,self.r)
+        a=np.dot(h,h.T)
+        a[np.diag_indices_from(a)]+=self.Lambda
+        self.L=cholesky(a,lower=True)
+        self.b=np.dot(h,y)
+        self.x=x.copy()
+        self.y=y.copy()
+        self.nd=len(x)
+        return self
+    #------------------------------------------------------
+    def _check_factor(self):
+        if self.L is None:
+            raise ValueError("OnlineRBF with Lambda<=0 needs fit() before incremental updates")
+    #------------------------------------------------------
+    def add_point(self,x,y):
+        self._check_factor()
+        x=np.asarray(x,dtype=float)
+        hx=kernelmatrix(x[None,:],self.c,self.r)[:,0]
+        cholupdate(self.L,hx)
+        self.b+=hx*y
+        if self.nd==len(self.x):
+            #grow the data buffer geometrically
+            self.x=np.resize(self.x,(2*len(self.x)+1,self.x.shape[1]))
+            self.y=np.resize(self.y,2*len(self.y)+1)
+        self.x[self.nd]=x
+        self.y[self.nd]=y
+        self.nd+=1
+    #------------------------------------------------------
+    def remove_point(self,index):
+        # O(1) swap-with-last removal: the last sample (index nd-1) is renumbered to `index`
+        # returns that old index so callers holding indices can remap it, or None if nothing moved
+        self._check_factor()
+        if not 0<=index<self.nd:
+            raise IndexError("data index "+str(index)+" out of range (nd="+str(self.nd)+")")
+        hx=kernelmatrix(self.x[index][None,:],self.c,self.r)[:,0]
+        cholupdate(self.L,hx,downdate=True)
+        self.b-=hx*self.y[index]
+        last=self.nd-1
+        self.x[index]=self.x[last]
+        self.y[index]=self.y[last]
+        self.nd=last
+        return last if index!=last else None
+    #------------------------------------------------------
+    def add_center(self,cnew):
+        # border the factor with one row: O(n*m) kernel column + O(m^2) triangular solve
+        self._check_factor()
+        cnew=np.asarray(cnew,dtype=float)
+        x=self.x[:self.nd]
+        hold=kernelmatrix(x,self.c,self.r)
+        hnew=kernelmatrix(x,cnew[None,:],self.r)[0]
+        col=np.dot(hold,hnew)
+        l=solve_triangular(self.L,col,lower=True)
+        d=np.dot(hnew,hnew)+self.Lambda-np.dot(l,l)
+        if d<=0.0:
+            raise np.linalg.LinAlgError("new center is linearly dependent")
+        m=len(self.c)
+        L=np.zeros((m+1,m+1))
+        L[:m,:m]=self.L
+        L[m,:m]=l
+        L[m,m]=np.sqrt(d)
+        self.L=L
+        self.b=np.append(self.b,np.dot(hnew,self.y[:self.nd]))
+        self.c=np.vstack([self.c,cnew])
+    #------------------------------------------------------
+    @property
+    def w(self):
+        self._check_factor()
+        return cho_solve((self.L,True),self.b)
+    def predict(self,X,chunk=None):
+        return predict(X,self.w,self.c,self.r,chunk)
 
 if __name__ == '__main__':
     #file=open("Approximation.csv","w")
@@ -142,3 +313,15 @@ if __name__ == '__main__':
     readInputFile(str(fname),param,inputData)
     print(str(param.nv)+" "+str(param.nd)+" "+str(param.nconv))
 
+    #automatic selection of baseradius/baselambda by LOOCV (centers = data points)
+    inputData.c=inputData.var_list
+    inputData.minlist=inputData.var_list.min(axis=0)
+    inputData.maxlist=inputData.var_list.max(axis=0)
+    radii=[0.05,0.1,0.2,0.4,0.8,1.6]
+    lambdas=[1.0e-8,1.0e-6,1.0e-4,1.0e-2,1.0]
+    best,table=tunehyperparameters(inputData.var_list,inputData.c,inputData.func_list,radii,lambdas)
+    inputData.baseradius,inputData.baselambda=best[0],best[1]
+    span=inputData.maxlist-inputData.minlist
+    inputData.r=inputData.baseradius*np.where(span==0,1.0,span)
+    inputData.w=RBF(inputData.var_list,inputData.c,inputData.r,inputData.baselambda,inputData.func_list)
+    print("baseradius="+str(inputData.baseradius)+" baselambda="+str(inputData.baselambda)+" LOOCV="+str(best[2]))
@@ -3,19 +3,18 @@ import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.patches import Polygon, Circle
 from geomdl import NURBS, knotvector
-import json
 import os
-import ast
-import re
 import shutil
 
+from car_presets import CAR_MODELS, TIRE_RADIUS
+from survey_data import CSV_FILE, read_raw_csv, clean_rows, parse_shape, response_name
+
 # === 設定 ===
 # スプレッドシートID (URLの /d/ と /edit の間の文字列)
 SPREADSHEET_ID = "1-mgxO9tqejwKehnbLS5B2JhCocdHH_xDWSZRLGKAE3A"
 # 公開CSVダウンロード用URL
 CSV_URL = f"https://docs.google.com/spreadsheets/d/{SPREADSHEET_ID}/export?format=csv"
 
-CSV_FILE = "car_data.csv"
 OUTPUT_DIR = "output_images_attributes"
 
 # === 0. 最新データをダウンロード (公開リンク方式) ===
@@ -35,44 +34,6 @@ def fetch_latest_data():
         print("既存の car_data.csv を使用して処理を続行します。")
         return False
 
-# === 1. ヘルパー関数群 ===
-def find_keyword(text, keywords, default="unknown"):
-    text_str = str(text).lower()
-    for k in keywords:
-        if k.lower() in text_str:
-            return k
-    return default
-
-def get_age_label(text):
-    match = re.search(r'(\d+s)', str(text))
-    if match:
-        return match.group(1)
-    return "unknown"
-
-def get_gender_label(text):
-    text_str = str(text).upper()
-    if "(M)" in text_str or "男性" in text_str: return "M"
-    if "(F)" in text_str or "女性" in text_str: return "F"
-    if "M" in text_str and "F" not in text_str: return "M"
-    if "F" in text_str and "M" not in text_str: return "F"
-    return "unknown"
-
-# 定数定義
-ADJECTIVES = ["cute", "cool", "sturdy", "fast", "luxury", "familiar", 
-              "かわいい", "かっこいい", "頑丈そう", "速そう", "高級な", "親しみのある"]
-ADJ_MAP = {
-    "かわいい": "cute", "かっこいい": "cool", "頑丈そう": "sturdy",
-    "速そう": "fast", "高級な": "luxury", "親しみのある": "familiar"
-}
-CAR_MODELS = {
-    "軽自動車": { "tire": [(0.85, 0.1), (8.5, 0.1)] },
-    "コンパクトカー": { "tire": [(0.85, -0.2), (8.8, -0.2)] },
-    "SUV": { "tire": [(1.8, -0.5), (8.1, -0.5)] },
-    "セダン": { "tire": [(1.6, 1.0), (8.2, 1.0)] },
-    "ミニバン": { "tire": [(1.6, 0.2), (8.3, 0.2)] },
-    "クーペ": { "tire": [(1.8, 1.0), (8.0, 1.0)] }
-}
-
 # === メイン処理開始 ===
 if __name__ == "__main__":
     
@@ -85,63 +46,8 @@ if __name__ == "__main__":
 
     # 2. データの読み込みと修復
     print("\n--- [Step 1] ローカルデータの読み込みと解析 ---")
-    try:
-        df_raw = pd.read_csv(CSV_FILE, header=None, encoding='utf-8-sig', on_bad_lines='skip')
-    except:
-        print("UTF-8での読み込みに失敗、cp932で試行します...")
-        df_raw = pd.read_csv(CSV_FILE, header=None, encoding='cp932', on_bad_lines='skip')
-
-    cleaned_data = []
-
-    for index, row in df_raw.iterrows():
-        try:
-            row_list = [str(x) for x in row.tolist()]
-            
-            # 制御点データの位置を探す（[[...]] を目印にする）
-            ctrl_idx = -1
-            for i, val in enumerate(row_list):
-                if val.strip().startswith('[['):
-                    ctrl_idx = i
-                    break
-            
-            if ctrl_idx == -1:
-                continue
-
-            # 相対位置からデータを取得
-            gender_raw = row_list[ctrl_idx - 3] if ctrl_idx >= 3 else ""
-            age_raw    = row_list[ctrl_idx - 2] if ctrl_idx >= 2 else ""
-            model_raw  = row_list[ctrl_idx - 1]
-            ctrl_raw   = row_list[ctrl_idx]
-            weight_raw = row_list[ctrl_idx + 1]
-            adj_raw    = row_list[ctrl_idx + 3] if len(row_list) > ctrl_idx + 3 else "unknown"
-            
-            # 車種名の正規化
-            model_clean = "UnknownModel"
-            m = model_raw
-            if "Light" in m or "軽" in m: model_clean = "軽自動車"
-            elif "Compact" in m or "コンパクト" in m: model_clean = "コンパクトカー"
-            elif "SUV" in m: model_clean = "SUV"
-            elif "Sedan" in m or "セダン" in m: model_clean = "セダン"
-            elif "Minivan" in m or "ミニバン" in m: model_clean = "ミニバン"
-            elif "Coupe" in m or "coupe" in m or "クー" in m: model_clean = "クーペ"
-
-            # 形容詞の抽出と英語変換
-            found_adj = find_keyword(adj_raw, ADJECTIVES, default="unknown")
-            if found_adj in ADJ_MAP:
-                found_adj = ADJ_MAP[found_adj]
-            
-            cleaned_data.append({
-                "gender": get_gender_label(gender_raw),
-                "age": get_age_label(age_raw),
-                "model": model_clean,
-                "adjective": found_adj,
-                "ctrlpts": ctrl_raw,
-                "weights": weight_raw,
-                "idx": index + 1  # 【修正点】スプレッドシートの行番号(1始まり)に合わせるため +1 する
-            })
-
-        except Exception:
-            pass
+    df_raw = read_raw_csv(CSV_FILE)
+    cleaned_data = clean_rows(df_raw)
 
     # 3. 画像生成（差分更新）
     print(f"--- [Step 2] 画像生成を開始します ({len(cleaned_data)}件) ---")
@@ -151,7 +57,7 @@ if __name__ == "__main__":
 
     for row in cleaned_data:
         try:
-            filename = f"{row['idx']:03d}_{row['model']}_{row['age']}_{row['gender']}_{row['adjective']}.png"
+            filename = f"{response_name(row)}.png"
             
             # 既存チェック（サブフォルダ内 or ルート直下）
             target_path_in_subfolder = os.path.join(OUTPUT_DIR, row['adjective'], filename)
@@ -164,12 +70,7 @@ if __name__ == "__main__":
 
             # === 画像描画処理 ===
             model_name = row['model']
-            try:
-                ctrlpts = json.loads(row['ctrlpts'])
-                weights = json.loads(row['weights'])
-            except:
-                ctrlpts = ast.literal_eval(row['ctrlpts'])
-                weights = ast.literal_eval(row['weights'])
+            ctrlpts, weights = parse_shape(row)
 
             curve = NURBS.Curve()
             curve.degree = 3
@@ -182,9 +83,9 @@ if __name__ == "__main__":
             fig, ax = plt.subplots(figsize=(10, 7))
             ax.set_axis_off()
 
-            tire_info = CAR_MODELS.get(model_name, {}).get("tire", [])
+            tire_info = CAR_MODELS.get(model_name, {}).get("tire_coords", [])
             for t in tire_info:
-                ax.add_patch(Circle((t[0], t[1]), 0.9, color='black', zorder=1))
+                ax.add_patch(Circle((t[0], t[1]), TIRE_RADIUS, color='black', zorder=1))
 
             poly_pts = curve.evalpts + [ctrlpts[-1], ctrlpts[0]]
             ax.add_patch(Polygon(poly_pts, closed=True, color='black', alpha=1.0))
@@ -0,0 +1,210 @@
+import numpy as np
+from functools import lru_cache
+from math import comb
+from geomdl import knotvector
+from scipy.interpolate import BSpline
+
+# === 設定（各エディタと同じ 3次・delta=0.01） ===
+DEGREE = 3
+DELTA = 0.01
+QUAD_ORDER = 6     # 小区間あたりの Gauss-Legendre 点数
+QUAD_LEVELS = 14   # ノット区間の両端へ向けた細分の段数
+
+
+# geomdl と同じサンプル数・パラメータ列
+@lru_cache(maxsize=None)
+def sample_params(delta=DELTA):
+    sample_size = int((1.0 / delta) + 0.5)
+    u = np.linspace(0.0, 1.0, sample_size)
+    u.setflags(write=False)
+    return u
+
+
+# 制御点数ごとの基底行列 N (サンプル数 x 制御点数) をキャッシュ
+# ノットベクトルは knotvector.generate と同じ一様クランプ
+@lru_cache(maxsize=None)
+def basis_matrix(n_ctrlpts, degree=DEGREE, delta=DELTA):
+    kv = np.array(knotvector.generate(degree, n_ctrlpts))
+    N = BSpline(kv, np.eye(n_ctrlpts), degree)(sample_params(delta))
+    N.setflags(write=False)
+    return N
+
+
+# 制御点数ごとの nu 階微分の基底行列 (サンプル数 x 制御点数) をキャッシュ（nu=0 は basis_matrix と同じ）
+@lru_cache(maxsize=None)
+def derivative_basis(n_ctrlpts, nu=1, degree=DEGREE, delta=DELTA):
+    if nu == 0:
+        return basis_matrix(n_ctrlpts, degree, delta)
+    kv = np.array(knotvector.generate(degree, n_ctrlpts))
+    dN = BSpline(kv, np.eye(n_ctrlpts), degree)(sample_params(delta), nu=nu)
+    dN.setflags(write=False)
+    return dN
+
+
+# 面積などの積分用の求積則（制御点数ごとにキャッシュ）
+# 重みの比が大きいと曲線はノット付近の狭いパラメータ範囲で急に動くので、
+# 各ノット区間を両端に向かって幾何級数的に細かく分け（幅 2^-levels まで）、小区間ごとに Gauss-Legendre
+# -> 求積点 u, 求積重み, 基底 N と1階微分 dN
+@lru_cache(maxsize=None)
+def quadrature_rule(n_ctrlpts, degree=DEGREE, order=QUAD_ORDER, levels=QUAD_LEVELS):
+    kv = np.array(knotvector.generate(degree, n_ctrlpts))
+    spans = np.unique(kv)
+    k = np.arange(levels, 0, -1)
+    g = np.concatenate([[0.0], 2.0 ** -k, 1.0 - 2.0 ** -k[::-1][1:], [1.0]])
+    h = np.diff(spans)[:, None]
+    a = (spans[:-1, None] + h * g[None, :-1]).ravel()
+    b = (spans[:-1, None] + h * g[None, 1:]).ravel()
+    x, wq = np.polynomial.legendre.leggauss(order)
+    u = (0.5 * (b - a)[:, None] * x + 0.5 * (a + b)[:, None]).ravel()
+    qw = (0.5 * (b - a)[:, None] * wq).ravel()
+    spline = BSpline(kv, np.eye(n_ctrlpts), degree)
+    N, dN = spline(u), spline(u, nu=1)
+    for arr in (u, qw, N, dN):
+        arr.setflags(write=False)
+    return u, qw, N, dN
+
+
+# 有理曲線の値と微分をまとめて計算する
+# bases: [N, dN, d2N, ...]（同じパラメータ列での基底とその微分）-> [C, C', C'', ...]（各 (..., 点数, 2)）
+# A = N (wP), W = N w として C^(k) = (A^(k) - sum_{i=1..k} comb(k, i) W^(i) C^(k-i)) / W
+def rational_derivatives(ctrlpts, weights, bases):
+    P = np.asarray(ctrlpts, dtype=float)
+    w = np.asarray(weights, dtype=float)
+    Pw = P * w[..., None]
+    A = [B @ Pw for B in bases]
+    W = [(w @ B.T)[..., None] for B in bases]
+    out = []
+    for k in range(len(bases)):
+        num = A[k] - sum(comb(k, i) * W[i] * out[k - i] for i in range(1, k + 1))
+        out.append(num / W[0])
+    return out
+
+
+# サンプル点での C, C', C'', ...（order 階まで, 各 (..., サンプル数, 2)）をまとめて計算
+def curve_derivatives(ctrlpts, weights, order=2, delta=DELTA):
+    n = np.shape(ctrlpts)[-2]
+    return rational_derivatives(ctrlpts, weights, [derivative_basis(n, k, DEGREE, delta) for k in range(order + 1)])
+
+
+# 符号付き曲率 κ = (x'y'' - y'x'') / |C'|^3（左に曲がると正）と単位接線
+# ctrlpts: (..., n, 2), weights: (..., n) -> κ (..., サンプル数), 接線 (..., サンプル数, 2)
+def curvature(ctrlpts, weights, delta=DELTA):
+    _, d1, d2 = curve_derivatives(ctrlpts, weights, 2, delta)
+    speed = np.linalg.norm(d1, axis=-1)
+    kappa = (d1[..., 0] * d2[..., 1] - d1[..., 1] * d2[..., 0]) / np.maximum(speed, 1e-300) ** 3
+    return kappa, d1 / np.maximum(speed, 1e-300)[..., None]
+
+
+# 制御点数がばらばらな形状のリストを、同じ制御点数（keys を渡せば (keys[i], 制御点数)）ごとにまとめる
+# -> (元の番号の配列 idx, P (件数, n, 2), w (件数, n), 基底 N) を順に返す（結果は out[idx] = ... で元の順に戻す）
+def shape_groups(ctrlpts_list, weights_list, keys=None, delta=DELTA):
+    groups = {}
+    for i, pts in enumerate(ctrlpts_list):
+        groups.setdefault((None if keys is None else keys[i], len(pts)), []).append(i)
+    for (_, n), idx in groups.items():
+        P = np.array([ctrlpts_list[i] for i in idx], dtype=float)
+        w = np.array([weights_list[i] for i in idx], dtype=float)
+        yield np.array(idx), P, w, basis_matrix(n, DEGREE, delta)
+
+
+# 制御点数がばらばらな形状のリストの曲率プロファイル -> (形状数, サンプル数)
+def curvature_profiles(ctrlpts_list, weights_list, delta=DELTA):
+    out = np.empty((len(ctrlpts_list), len(sample_params(delta))))
+    for idx, P, w, _ in shape_groups(ctrlpts_list, weights_list, delta=delta):
+        out[idx] = curvature(P, w, delta)[0]
+    return out
+
+
+# 曲率くし（EditCar3.py の「Curvature Comb」の表示用）: 各サンプル点から曲率に比例した長さの歯を曲率中心と反対側へ伸ばす
+# -> 根元 (サンプル数, 2), 先端 (サンプル数, 2)
+def curvature_comb(ctrlpts, weights, scale=0.5, delta=DELTA):
+    C = evaluate_curve(ctrlpts, weights, delta)
+    kappa, tangent = curvature(ctrlpts, weights, delta)
+    normal = np.column_stack([-tangent[:, 1], tangent[:, 0]])
+    return C, C - scale * kappa[:, None] * normal
+
+
+# 曲率に応じた再サンプリング: 点の密度を |C'| (sqrt|κ| + 平均) に比例させる
+# （折れ線近似の誤差 ~ κ h^2 / 8 をそろえる。半分は弧長に沿って均等に配る）
+# 細かい評価点で密度を積分し、逆関数からパラメータを決めて評価する -> (n_points, 2)
+# （silhouette_distance の輪郭の点列に使う）
+def adaptive_sample(ctrlpts, weights, n_points=100, fine_delta=0.001):
+    P = np.asarray(ctrlpts, dtype=float)
+    w = np.asarray(weights, dtype=float)
+    u = sample_params(fine_delta)
+    kappa, _ = curvature(P, w, fine_delta)
+    speed = np.linalg.norm(curve_derivatives(P, w, 1, fine_delta)[1], axis=-1)
+    root = np.sqrt(np.abs(kappa))
+    rho = speed * (root + np.sum(speed * root) / np.sum(speed))
+    cum = np.concatenate([[0.0], np.cumsum(0.5 * (rho[1:] + rho[:-1]) * np.diff(u))])
+    t = np.interp(np.linspace(0.0, cum[-1], n_points), cum, u)
+    kv = np.array(knotvector.generate(DEGREE, len(P)))
+    (C,) = rational_derivatives(P, w, [BSpline(kv, np.eye(len(P)), DEGREE)(t)])
+    return C
+
+
+# 有理曲線をまとめて評価する
+# ctrlpts: (..., n, 2), weights: (..., n) -> (..., サンプル数, 2)
+def evaluate_curves(ctrlpts, weights, delta=DELTA):
+    P = np.asarray(ctrlpts, dtype=float)
+    w = np.asarray(weights, dtype=float)
+    N = basis_matrix(P.shape[-2], DEGREE, delta)
+    num = N @ (P * w[..., None])
+    den = w @ N.T
+    return num / den[..., None]
+
+
+# 1つの形状だけを評価（ctrlpts: (n, 2), weights: (n,) -> (サンプル数, 2)）
+def evaluate_curve(ctrlpts, weights, delta=DELTA):
+    P = np.asarray(ctrlpts, dtype=float)
+    w = np.asarray(weights, dtype=float)
+    if P.ndim != 2 or w.ndim != 1 or len(P) != len(w):
+        raise ValueError(f"1つの形状を指定してください: ctrlpts {P.shape}, weights {w.shape}")
+    return evaluate_curves(P, w, delta)
+
+
+# 制御点数がばらばらな形状のリストを、同じ制御点数ごとにまとめて評価する
+def evaluate_many(ctrlpts_list, weights_list, delta=DELTA):
+    results = [None] * len(ctrlpts_list)
+    for idx, P, w, N in shape_groups(ctrlpts_list, weights_list, delta=delta):
+        (curves,) = rational_derivatives(P, w, [N])
+        for k, i in enumerate(idx):
+            results[i] = curves[k]
+    return results
+
+
+# 評価点列を弧長で等間隔に m 点へ再サンプリング（形状どうしを比較するための固定長ベクトル）
+# curves: (形状数, サンプル数, 2) または同じ長さの配列のリスト -> (形状数, m, 2)
+def resample_curves(curves, m=64):
+    curves = np.asarray(curves, dtype=float)
+    if len(curves) == 0:
+        return np.empty((0, m, 2))
+    seg = np.linalg.norm(np.diff(curves, axis=1), axis=2)
+    s = np.concatenate([np.zeros((len(curves), 1)), np.cumsum(seg, axis=1)], axis=1)
+    s /= np.where(s[:, -1:] > 0, s[:, -1:], 1.0)
+    t = np.linspace(0.0, 1.0, m)
+    out = np.empty((len(curves), m, 2))
+    for i in range(len(curves)):
+        out[i, :, 0] = np.interp(t, s[i], curves[i, :, 0])
+        out[i, :, 1] = np.interp(t, s[i], curves[i, :, 1])
+    return out
+
+
+# 曲線 C(u) の制御点・重みに関する解析的な微分
+# dC/dP_j = R_j(u)（有理基底, サンプル数 x n）
+# dC/dw_j = N_j(u) (P_j - C(u)) / W(u)（サンプル数 x n x 2）
+def curve_jacobian(ctrlpts, weights, delta=DELTA):
+    P = np.asarray(ctrlpts, dtype=float)
+    w = np.asarray(weights, dtype=float)
+    N = basis_matrix(len(P), DEGREE, delta)
+    W = N @ w
+    R = N * w / W[:, None]
+    C = R @ P
+    dC_dw = (N / W[:, None])[:, :, None] * (P[None, :, :] - C[:, None, :])
+    return R, dC_dw
+
+
+# 塗りつぶし用の多角形（curve.evalpts + [ctrlpts[-1], ctrlpts[0]] と同じ）
+def silhouette_polygon(curve_pts, ctrlpts):
+    ctrlpts = np.asarray(ctrlpts, dtype=float)
+    return np.vstack([curve_pts, ctrlpts[-1], ctrlpts[0]])
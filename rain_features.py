@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
+
+# === 設定 ===
+WINDOWS = [3, 6, 12, 24, 48, 72]   # 移動和・移動最大の窓幅 [時間]
+API_HALF_LIVES = [24, 72]          # 先行降雨指数の半減期 [時間]
+CHUNK_SIZE = 100000                # CSV を読み込む行数（チャンク）
+
+
+# === 時間雨量の移動窓特徴量（ストリーミング対応） ===
+# 移動和は累積和の差、移動最大はストライド（sliding_window_view）、
+# 先行降雨指数 API_t = k * API_{t-1} + P_t は1次の再帰フィルタ（lfilter）で計算する。
+# 直前のチャンクの末尾（最大窓幅 - 1 時間）と API の値を持ち越すので、
+# チャンクに分けて流しても全体を一度に計算した結果と同じになる。
+class RainFeatureStream:
+    def __init__(self, windows=WINDOWS, api_half_lives=API_HALF_LIVES):
+        self.windows = list(windows)
+        self.decays = [0.5 ** (1.0 / h) for h in api_half_lives]
+        self.api_half_lives = list(api_half_lives)
+        # 開始前は雨なしとみなす（雨量は非負なので和・最大とも min_periods=1 と同じ）
+        self.tail = np.zeros(max(self.windows) - 1)
+        self.api = np.zeros(len(self.decays))
+
+    def transform(self, hourly_rain):
+        x = np.nan_to_num(np.asarray(hourly_rain, dtype=float), nan=0.0)
+        index = hourly_rain.index if isinstance(hourly_rain, (pd.Series, pd.DataFrame)) else None
+        n = len(x)
+        if n == 0:
+            # 空のチャンク: 状態（末尾・API）はそのままで、列だけそろえた空の表を返す
+            names = ([f"rain_sum_{w}h" for w in self.windows] + [f"rain_max_{w}h" for w in self.windows]
+                     + [f"api_{h}h" for h in self.api_half_lives])
+            return pd.DataFrame({c: np.empty(0) for c in names}, index=index)
+        buf = np.concatenate([self.tail, x])
+        offset = len(self.tail)
+        csum = np.concatenate([[0.0], np.cumsum(buf)])
+        end = np.arange(offset + 1, offset + n + 1)
+
+        features = {}
+        for w in self.windows:
+            features[f"rain_sum_{w}h"] = csum[end] - csum[end - w]
+        for w in self.windows:
+            features[f"rain_max_{w}h"] = sliding_window_view(buf, w)[offset - w + 1:].max(axis=1)
+        for i, (k, h) in enumerate(zip(self.decays, self.api_half_lives)):
+            api, _ = lfilter([1.0], [1.0, -k], x, zi=[k * self.api[i]])
+            features[f"api_{h}h"] = api
+            self.api[i] = api[-1]
+
+        self.tail = buf[len(buf) - len(self.tail):]
+        return pd.DataFrame(features, index=index)
+
+
+# 1本の時系列をまとめて変換
+def rolling_features(hourly_rain, **kwargs):
+    return RainFeatureStream(**kwargs).transform(hourly_rain)
+
+
+# 複数年・複数ファイルの CSV をチャンクごとに読み込み、特徴量を付けて返す
+# （ファイルを時系列順に並べれば、ファイルの境目も連続した系列として扱う）
+def iter_feature_chunks(paths, columns, rain_column="Hourly_rain", chunksize=CHUNK_SIZE, skiprows=2, **kwargs):
+    if isinstance(paths, str):
+        paths = [paths]
+    stream = RainFeatureStream(**kwargs)
+    for path in paths:
+        for chunk in pd.read_csv(path, skiprows=skiprows, chunksize=chunksize):
+            chunk.columns = columns
+            yield pd.concat([chunk, stream.transform(chunk[rain_column])], axis=1)
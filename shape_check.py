@@ -0,0 +1,205 @@
+import numpy as np
+import pandas as pd
+
+# === 設定 ===
+EPS = 1e-9          # 交差判定の許容誤差
+DUP_TOL = 1e-9      # これより近い連続点は同じ点とみなす
+MIN_AREA = 1e-3     # これより小さい面積はつぶれた形状とみなす
+
+# check_silhouette の理由コード
+REASON_MESSAGES = {
+    "ok": "問題なし",
+    "too_few_points": "頂点が足りません",
+    "zero_area": "形がつぶれています（面積がほぼ0）",
+    "fold_back": "輪郭が折り返しています",
+    "self_intersection": "輪郭が自分自身と交差しています",
+}
+
+
+# 向き: >0 左回り, <0 右回り, 0 一直線
+def _orient(a, b, c):
+    v = (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+    return 0 if abs(v) <= EPS else (1 if v > 0 else -1)
+
+
+def _on_segment(a, b, c):
+    return (min(a[0], b[0]) - EPS <= c[0] <= max(a[0], b[0]) + EPS
+            and min(a[1], b[1]) - EPS <= c[1] <= max(a[1], b[1]) + EPS)
+
+
+# 線分 p1p2 と q1q2 が交わる（接する場合も含む）か
+def segments_intersect(p1, p2, q1, q2):
+    d1, d2 = _orient(q1, q2, p1), _orient(q1, q2, p2)
+    d3, d4 = _orient(p1, p2, q1), _orient(p1, p2, q2)
+    if d1 * d2 < 0 and d3 * d4 < 0:
+        return True
+    return ((d1 == 0 and _on_segment(q1, q2, p1)) or (d2 == 0 and _on_segment(q1, q2, p2))
+            or (d3 == 0 and _on_segment(p1, p2, q1)) or (d4 == 0 and _on_segment(p1, p2, q2)))
+
+
+# === 外接矩形による候補の絞り込み ===
+# 隣り合わない辺の組のうち、外接矩形（EPS だけ広げる）が重なるものだけを返す（交差する組は必ず含まれる）
+# 左端の x でソートし、各辺の右端までに左端がある辺を searchsorted でまとめて数える（O(n log n + 候補数)）
+# -> 辺の番号の配列 i, j（i の左端 <= j の左端）
+def _bbox_candidates(vertices):
+    a = np.asarray(vertices, dtype=float)
+    b = np.roll(a, -1, axis=0)
+    lo, hi = np.minimum(a, b) - EPS, np.maximum(a, b) + EPS
+    m = len(a)
+    order = np.argsort(lo[:, 0], kind="stable")
+    start = np.arange(1, m + 1)
+    count = np.maximum(np.searchsorted(lo[order, 0], hi[order, 0], side="right") - start, 0)
+    offset = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+    i = order[np.repeat(np.arange(m), count)]
+    j = order[np.repeat(start, count) + offset]
+    d = np.abs(i - j)
+    ok = (lo[i, 1] <= hi[j, 1]) & (lo[j, 1] <= hi[i, 1]) & (d != 1) & (d != m - 1)
+    return i[ok], j[ok]
+
+
+# === 走査線法（Shamos-Hoey）による閉じた多角形の自己交差の検出 ===
+# 端点をx順に並べ、走査線と交わる辺を上下順に保持して、隣り合う辺どうしだけを調べる
+# 上下順はリストで持つので挿入・削除は O(走査線と交わる辺の数)、最悪 O(n^2)
+# （シルエットは走査線と数本しか交わらないので実際にはほぼ O(n log n)）
+# その前に _bbox_candidates で絞り込み、候補がなければ走査しない（回答データではすべてこれで済む）。
+# 候補があるときも、候補に出てくる辺だけを走査する
+# 最初の交差が見つかるまでは辺の上下順は変わらないので、挿入時の位置で比べればよい
+# （走査は (x, y) の辞書順に進むとみなし、垂直な辺はその時点の y の位置にあるものとして比べる）
+# 隣の辺（頂点を共有する）どうしは、その頂点で接するのは正常なので調べない（折り返しは別に調べる）
+# -> 交差する辺の番号の組 (i, j)、なければ None（辺 i は vertices[i] -> vertices[i+1]）
+def find_self_intersection(vertices):
+    cand_i, cand_j = _bbox_candidates(vertices)
+    if len(cand_i) == 0:
+        return None
+    v = [tuple(map(float, p)) for p in vertices]
+    m = len(v)
+    segs = []
+    for i in range(m):
+        a, b = v[i], v[(i + 1) % m]
+        segs.append((a, b) if a <= b else (b, a))
+
+    def adjacent(i, j):
+        return abs(i - j) == 1 or abs(i - j) == m - 1
+
+    # 走査線（点 (x, y) を通る）上での辺 i の高さ。垂直な辺は y を辺の範囲に収めた値
+    def y_at(i, x, y):
+        (x0, y0), (x1, y1) = segs[i]
+        if x1 - x0 <= EPS:
+            return min(max(y, y0), y1)
+        return y0 + (y1 - y0) * (x - x0) / (x1 - x0)
+
+    def slope(i):
+        (x0, y0), (x1, y1) = segs[i]
+        return np.inf if x1 - x0 <= EPS else (y1 - y0) / (x1 - x0)
+
+    def check(i, j):
+        if i is None or j is None or adjacent(i, j):
+            return None
+        if segments_intersect(segs[i][0], segs[i][1], segs[j][0], segs[j][1]):
+            return (min(i, j), max(i, j))
+        return None
+
+    # 走査線上の点 (x, y) で、辺 i が辺 k より下にあるか（高さが同じなら傾きで比べる）
+    def below_than(i, k, x, y):
+        return (y_at(i, x, y), slope(i)) < (y_at(k, x, y), slope(k))
+
+    # (点, 0=開始 / 1=終了, 辺番号)。同じ点では開始を先に処理する（接触を見逃さない）
+    targets = np.unique(np.concatenate([cand_i, cand_j])).tolist()
+    events = sorted([(segs[i][0], 0, i) for i in targets] + [(segs[i][1], 1, i) for i in targets])
+    active = []   # 走査線と交わる辺（y の小さい順）
+    for point, kind, i in events:
+        x, y = point
+        if kind == 0:
+            lo, hi = 0, len(active)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if below_than(active[mid], i, x, y):
+                    lo = mid + 1
+                else:
+                    hi = mid
+            active.insert(lo, i)
+            pos = lo
+            below = active[pos - 1] if pos > 0 else None
+            above = active[pos + 1] if pos + 1 < len(active) else None
+            hit = check(i, below) or check(i, above)
+        else:
+            pos = active.index(i)
+            below = active[pos - 1] if pos > 0 else None
+            above = active[pos + 1] if pos + 1 < len(active) else None
+            active.pop(pos)
+            hit = check(below, above)
+        if hit:
+            return hit
+    return None
+
+
+# 連続する同じ点を取り除く（閉じた多角形として、最後と最初も比べる）
+def _dedupe(poly):
+    poly = np.asarray(poly, dtype=float)
+    keep = np.ones(len(poly), dtype=bool)
+    keep[1:] = np.linalg.norm(np.diff(poly, axis=0), axis=1) > DUP_TOL
+    poly = poly[keep]
+    if len(poly) > 1 and np.linalg.norm(poly[-1] - poly[0]) <= DUP_TOL:
+        poly = poly[:-1]
+    return poly
+
+
+# === シルエット（curve.evalpts + [ctrlpts[-1], ctrlpts[0]]）の検査 ===
+# -> (理由コード, 交差する辺の組 or None)。理由コードが "ok" なら保存してよい
+def check_silhouette(curve_pts, ctrlpts):
+    ctrlpts = np.asarray(ctrlpts, dtype=float)
+    poly = _dedupe(np.vstack([np.asarray(curve_pts, dtype=float), ctrlpts[-1], ctrlpts[0]]))
+    if len(poly) < 3:
+        return "too_few_points", None
+    x, y = poly[:, 0], poly[:, 1]
+    if 0.5 * abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))) < MIN_AREA:
+        return "zero_area", None
+
+    # 隣り合う辺が一直線上で逆向き（とがった折り返し）
+    d0 = poly - np.roll(poly, 1, axis=0)
+    d1 = np.roll(poly, -1, axis=0) - poly
+    cross = d0[:, 0] * d1[:, 1] - d0[:, 1] * d1[:, 0]
+    dot = np.sum(d0 * d1, axis=1)
+    scale = np.linalg.norm(d0, axis=1) * np.linalg.norm(d1, axis=1)
+    folds = np.flatnonzero((np.abs(cross) <= 1e-9 * scale) & (dot < 0))
+    if len(folds):
+        i = int(folds[0])
+        return "fold_back", ((i - 1) % len(poly), i)
+
+    hit = find_self_intersection(poly)
+    if hit is not None:
+        return "self_intersection", hit
+    return "ok", None
+
+
+def is_valid_silhouette(curve_pts, ctrlpts):
+    return check_silhouette(curve_pts, ctrlpts)[0] == "ok"
+
+
+# 回答データ全体の検査結果の表（idx, model, adjective, reason, segments）
+def audit_responses(responses):
+    from nurbs_basis import evaluate_many
+
+    curves = evaluate_many([r["ctrlpts"] for r in responses], [r["weights"] for r in responses])
+    records = []
+    for row, curve_pts in zip(responses, curves):
+        reason, hit = check_silhouette(curve_pts, row["ctrlpts"])
+        records.append({"idx": row["idx"], "model": row["model"], "adjective": row["adjective"],
+                        "reason": reason, "segments": hit})
+    return pd.DataFrame(records, columns=["idx", "model", "adjective", "reason", "segments"])
+
+
+if __name__ == "__main__":
+    import time
+    from survey_data import CSV_FILE, load_responses
+
+    responses = load_responses(CSV_FILE)
+    audit_responses(responses[:1])   # nurbs_basis（scipy）の読み込みと基底のキャッシュを計測から外す
+    t0 = time.perf_counter()
+    audit = audit_responses(responses)
+    dt = (time.perf_counter() - t0) * 1000
+    print(f"{len(audit)}件を検査: {dt:.1f} ms")
+    print(audit["reason"].value_counts().to_string())
+    bad = audit[audit["reason"] != "ok"]
+    for _, row in bad.iterrows():
+        print(f"  ID:{row['idx']:03d} {row['model']} {row['adjective']}: {REASON_MESSAGES[row['reason']]} {row['segments']}")
@@ -0,0 +1,145 @@
+import os
+import math
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from matplotlib.patches import Polygon, Circle
+from sklearn.decomposition import PCA
+from sklearn.cluster import MiniBatchKMeans
+
+from car_presets import CAR_MODELS, TIRE_RADIUS
+from nurbs_basis import evaluate_many, silhouette_polygon
+from shape_index import shape_vectors
+from survey_data import CSV_FILE, ADJ_LABELS, load_responses
+
+# === 設定 ===
+OUTPUT_DIR = "shape_clusters"
+N_CLUSTERS = 4        # 車種ごとのクラスタ数（回答数が少なければ自動で減らす）
+N_COMPONENTS = 8      # k-means の前に PCA で落とす次元
+BATCH_SIZE = 256      # MiniBatchKMeans のミニバッチ
+COLS = 4
+
+
+# === 車種ごとのシルエットのクラスタリング ===
+# 弧長で再サンプリングした曲線 -> PCA で次元削減 -> MiniBatchKMeans
+# PCA は最初の fit で固定し、以降の追加回答は partial_fit でクラスタ中心だけ更新する
+# （中心が動くので、追加のたびに全回答の所属をまとめて付け直す。縮約後の次元なので軽い）
+class ShapeClusters:
+    def __init__(self, model, n_clusters=N_CLUSTERS, n_components=N_COMPONENTS,
+                 batch_size=BATCH_SIZE, random_state=0):
+        self.model = model
+        self.n_clusters = n_clusters
+        self.n_components = n_components
+        self.batch_size = batch_size
+        self.random_state = random_state
+        self.pca = None
+        self.kmeans = None
+        self.rows = []
+        self.vectors = np.empty((0, 0))
+        self.labels = np.empty(0, dtype=int)
+
+    def _select(self, responses):
+        return [r for r in responses if r["model"] == self.model]
+
+    def fit(self, responses):
+        self.rows = self._select(responses)
+        if not self.rows:
+            raise ValueError(f"{self.model}: 回答がありません")
+        X = shape_vectors([r["ctrlpts"] for r in self.rows], [r["weights"] for r in self.rows])
+        n_comp = min(self.n_components, len(X), X.shape[1])
+        self.pca = PCA(n_components=n_comp).fit(X)
+        self.vectors = self.pca.transform(X)
+        self.kmeans = MiniBatchKMeans(n_clusters=min(self.n_clusters, len(X)), batch_size=self.batch_size,
+                                      n_init=3, random_state=self.random_state).fit(self.vectors)
+        self.labels = self.kmeans.predict(self.vectors)
+        return self
+
+    # 新しい回答を追加（他の車種の行は無視する）
+    def update(self, responses):
+        rows = self._select(responses)
+        if not rows:
+            return self
+        if self.kmeans is None:
+            return self.fit(rows)
+        X = shape_vectors([r["ctrlpts"] for r in rows], [r["weights"] for r in rows])
+        V = self.pca.transform(X)
+        self.kmeans.partial_fit(V)
+        self.rows += rows
+        self.vectors = np.vstack([self.vectors, V])
+        self.labels = self.kmeans.predict(self.vectors)
+        return self
+
+    # 各クラスタの中心に最も近い回答（メドイド）の行番号
+    def medoids(self):
+        d = np.linalg.norm(self.vectors[:, None, :] - self.kmeans.cluster_centers_[None, :, :], axis=2)
+        out = {}
+        for k in range(self.kmeans.n_clusters):
+            members = np.flatnonzero(self.labels == k)
+            if len(members):
+                out[k] = int(members[np.argmin(d[members, k])])
+        return out
+
+    # 所属表: 回答ID・形容詞・クラスタ
+    def membership(self):
+        return pd.DataFrame({
+            "idx": [r["idx"] for r in self.rows],
+            "adjective": [r["adjective"] for r in self.rows],
+            "cluster": self.labels,
+        })
+
+    # クラスタごとの形容詞の分布（行: クラスタ, 列: 形容詞, 値: 割合）
+    def adjective_distribution(self, normalize=True):
+        m = self.membership()
+        table = pd.crosstab(m["cluster"], m["adjective"]).reindex(columns=ADJ_LABELS, fill_value=0)
+        if normalize:
+            table = table.div(table.sum(axis=1), axis=0)
+        return table
+
+    # メドイドのシルエットを並べて保存
+    def render_medoids(self, path):
+        medoids = self.medoids()
+        rows = [self.rows[i] for i in medoids.values()]
+        curves = evaluate_many([r["ctrlpts"] for r in rows], [r["weights"] for r in rows])
+        dist = self.adjective_distribution()
+        counts = np.bincount(self.labels, minlength=self.kmeans.n_clusters)
+
+        n_rows = math.ceil(len(rows) / COLS)
+        fig, axes = plt.subplots(n_rows, COLS, figsize=(20, n_rows * 3.5), squeeze=False)
+        axes = axes.flatten()
+        fig.suptitle(f"{self.model}: cluster medoids (Total: {len(self.rows)})", fontsize=20)
+        for ax in axes:
+            ax.axis('off')
+        for ax, k, row, curve_pts in zip(axes, medoids.keys(), rows, curves):
+            for t in CAR_MODELS[self.model]["tire_coords"]:
+                ax.add_patch(Circle((t[0], t[1]), TIRE_RADIUS, color='black', zorder=1))
+            ax.add_patch(Polygon(silhouette_polygon(curve_pts, row["ctrlpts"]), closed=True, color='black'))
+            ax.set_aspect('equal')
+            ax.set_xlim(-3, 13)
+            ax.set_ylim(-3, 8)
+            top = dist.loc[k].sort_values(ascending=False)[:2]
+            words = ", ".join(f"{a} {p:.0%}" for a, p in top.items() if p > 0)
+            ax.set_title(f"C{k} n={counts[k]} (ID:{row['idx']:03d})\n{words}", fontsize=11)
+        plt.tight_layout(rect=[0, 0, 1, 0.95])
+        plt.savefig(path, bbox_inches='tight')
+        plt.close(fig)
+
+
+# 全車種のクラスタリング
+def cluster_all(responses=None, csv_file=CSV_FILE, **kwargs):
+    if responses is None:
+        responses = load_responses(csv_file)
+    result = {}
+    for model in CAR_MODELS:
+        if any(r["model"] == model for r in responses):
+            result[model] = ShapeClusters(model, **kwargs).fit(responses)
+    return result
+
+
+if __name__ == "__main__":
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    for model, sc in cluster_all().items():
+        sc.render_medoids(os.path.join(OUTPUT_DIR, f"{model}_clusters.png"))
+        sc.membership().to_csv(os.path.join(OUTPUT_DIR, f"{model}_membership.csv"), index=False)
+        print(f"\n{model}: {len(sc.rows)}件 -> {sc.kmeans.n_clusters}クラスタ")
+        print(sc.adjective_distribution().round(2).to_string())
+    print(f"\n保存先: {os.path.abspath(OUTPUT_DIR)}")
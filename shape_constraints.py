@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+from car_presets import CAR_MODELS, TIRE_RADIUS
+from nurbs_basis import evaluate_curves, rational_derivatives, shape_groups
+
+# === 設定 ===
+MIN_CLEARANCE = 0.0     # タイヤと車体の輪郭の最小すき間（これ未満はタイヤに食い込んでいる）
+GROUND_TOL = 0.05       # 接地線より下へのはみ出しの許容量（プリセットの SUV も少し下がっている）
+
+
+# 折れ線（各点を順につないだもの）と点の最短距離
+# polylines: (..., 点数, 2), points: (..., 点の数, 2) -> (..., 点の数)
+def polyline_distance(polylines, points):
+    L = np.asarray(polylines, dtype=float)
+    Q = np.asarray(points, dtype=float)
+    a = L[..., None, :-1, :]
+    d = L[..., None, 1:, :] - a
+    q = Q[..., :, None, :]
+    t = np.sum((q - a) * d, axis=-1) / np.maximum(np.sum(d * d, axis=-1), 1e-300)
+    t = np.clip(t, 0.0, 1.0)
+    gap = a + t[..., None] * d - q
+    return np.sqrt(np.min(np.sum(gap * gap, axis=-1), axis=-1))
+
+
+# 車体の輪郭（曲線）とタイヤ円のすき間（中心からの最短距離 - 半径、負ならタイヤに食い込んでいる）
+# curves: (..., サンプル数, 2), tire_coords: (..., タイヤ数, 2) -> (..., タイヤ数)
+def tire_clearance(curves, tire_coords, radius=TIRE_RADIUS):
+    return polyline_distance(curves, tire_coords) - radius
+
+
+# 接地線より下へのはみ出し量（0 ならはみ出しなし）
+# curves: (..., サンプル数, 2), ground_y: (...) -> (...)
+def ground_penetration(curves, ground_y):
+    lowest = np.asarray(curves, dtype=float)[..., 1].min(axis=-1)
+    return np.maximum(np.asarray(ground_y, dtype=float) - lowest, 0.0)
+
+
+# 1つの形状の検査結果（エディタの表示用）
+# curve_pts を渡せば評価済みの点列（curve.evalpts）を使う
+def constraint_report(model, ctrlpts, weights=None, curve_pts=None):
+    data = CAR_MODELS[model]
+    C = np.asarray(curve_pts, dtype=float) if curve_pts is not None else evaluate_curves(ctrlpts, weights)
+    clearance = tire_clearance(C, data["tire_coords"])
+    penetration = float(ground_penetration(C, data["ground_line"][2]))
+    return {
+        "clearance": clearance.tolist(),
+        "ground_penetration": penetration,
+        "ok": bool(np.all(clearance >= MIN_CLEARANCE) and penetration <= GROUND_TOL),
+    }
+
+
+# 回答データ全体の検査（車種・制御点数ごとにまとめて一括計算）
+# -> 表（idx, model, front_clearance, rear_clearance, ground_penetration, ok）
+def audit_constraints(responses):
+    front = np.full(len(responses), np.nan)
+    rear = np.full(len(responses), np.nan)
+    penetration = np.full(len(responses), np.nan)
+    known = np.array([i for i, row in enumerate(responses) if row["model"] in CAR_MODELS], dtype=int)
+    rows = [responses[i] for i in known]
+    for idx, P, w, N in shape_groups([r["ctrlpts"] for r in rows], [r["weights"] for r in rows],
+                                     keys=[r["model"] for r in rows]):
+        data = CAR_MODELS[rows[idx[0]]["model"]]
+        (C,) = rational_derivatives(P, w, [N])
+        idx = known[idx]
+        clearance = tire_clearance(C, data["tire_coords"])
+        front[idx], rear[idx] = clearance[:, 0], clearance[:, -1]
+        penetration[idx] = ground_penetration(C, data["ground_line"][2])
+    table = pd.DataFrame({
+        "idx": [r["idx"] for r in responses],
+        "model": [r["model"] for r in responses],
+        "front_clearance": front,
+        "rear_clearance": rear,
+        "ground_penetration": penetration,
+    })
+    table["ok"] = ((table["front_clearance"] >= MIN_CLEARANCE) & (table["rear_clearance"] >= MIN_CLEARANCE)
+                   & (table["ground_penetration"] <= GROUND_TOL))
+    return table
+
+
+if __name__ == "__main__":
+    import time
+    from survey_data import CSV_FILE, load_responses
+
+    responses = load_responses(CSV_FILE)
+    audit_constraints(responses[:1])
+    t0 = time.perf_counter()
+    table = audit_constraints(responses)
+    print(f"{len(table)}件を検査: {(time.perf_counter() - t0) * 1000:.1f} ms")
+    worst = table.groupby("model").agg({"front_clearance": "min", "rear_clearance": "min", "ground_penetration": "max"})
+    print(worst.round(3).to_string())
+    bad = table[~table["ok"]]
+    print(f"\n制約違反: {len(bad)}件")
+    if len(bad):
+        print(bad.round(3).to_string(index=False))
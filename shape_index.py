@@ -0,0 +1,105 @@
+import numpy as np
+from scipy.spatial import cKDTree
+from sklearn.decomposition import PCA
+
+from nurbs_basis import evaluate_many, resample_curves
+from survey_data import CSV_FILE, load_responses
+
+# === 設定 ===
+N_POINTS = 64         # 再サンプリングする点数（1形状 = 2 * N_POINTS 次元）
+N_COMPONENTS = 16     # PCA で落とす次元（None: PCA なし）
+REBUILD_SIZE = 256    # 追加分がこの件数を超えたら木を作り直す
+
+
+# 制御点・重みのリストから比較用ベクトル（弧長で再サンプリングした曲線）を作る
+def shape_vectors(ctrlpts_list, weights_list, n_points=N_POINTS):
+    curves = evaluate_many(ctrlpts_list, weights_list)
+    return resample_curves(curves, n_points).reshape(len(curves), 2 * n_points)
+
+
+# === 「自分の形に似た回答」を探す最近傍インデックス ===
+# KD-tree（scipy.spatial.cKDTree）で検索する。新しい回答は一旦バッファに入れて
+# 総当たりで検索し、REBUILD_SIZE 件たまったら木を作り直す（挿入ごとの再構築を避ける）
+class ShapeIndex:
+    def __init__(self, n_points=N_POINTS, n_components=N_COMPONENTS, rebuild_size=REBUILD_SIZE):
+        self.n_points = n_points
+        self.n_components = n_components
+        self.rebuild_size = rebuild_size
+        self.pca = None
+        self.tree = None
+        self.tree_vectors = None     # 木に入っているベクトル（次元は最初のデータで決まる）
+        self.buffer = []
+        self.rows = []
+
+    def _project(self, vectors):
+        if self.pca is None:
+            return vectors
+        return self.pca.transform(vectors)
+
+    def build(self, responses):
+        self.rows = list(responses)
+        vectors = shape_vectors([r["ctrlpts"] for r in self.rows],
+                                [r["weights"] for r in self.rows], self.n_points)
+        if self.n_components is not None and len(vectors) > self.n_components:
+            self.pca = PCA(n_components=self.n_components).fit(vectors)
+        else:
+            self.pca = None
+        self.tree_vectors = self._project(vectors)
+        self.tree = cKDTree(self.tree_vectors) if len(self.tree_vectors) else None
+        self.buffer = []
+        return self
+
+    # 保存された回答を1件追加（build 前でもよい）
+    def add(self, row):
+        v = self._project(shape_vectors([row["ctrlpts"]], [row["weights"]], self.n_points))[0]
+        self.rows.append(row)
+        self.buffer.append(v)
+        if len(self.buffer) >= self.rebuild_size:
+            new = np.array(self.buffer)
+            self.tree_vectors = new if self.tree_vectors is None else np.vstack([self.tree_vectors, new])
+            self.tree = cKDTree(self.tree_vectors)
+            self.buffer = []
+
+    def _search(self, v, k):
+        n_tree = 0 if self.tree is None else len(self.tree_vectors)
+        dist, idx = self.tree.query(v, k=min(k, n_tree)) if n_tree else (np.empty(0), np.empty(0, int))
+        dist, idx = np.atleast_1d(dist), np.atleast_1d(idx)
+        if self.buffer:
+            bd = np.linalg.norm(np.array(self.buffer) - v, axis=1)
+            dist = np.concatenate([dist, bd])
+            idx = np.concatenate([idx, n_tree + np.arange(len(bd))])
+        order = np.argsort(dist, kind="stable")[:k]
+        return dist[order], idx[order]
+
+    # 形状に近い過去の回答 k 件を (距離, 回答) のリストで返す
+    # model を指定するとその車種だけに絞る（足りなければ検索件数を増やす）
+    def query(self, ctrlpts, weights, k=5, model=None):
+        v = self._project(shape_vectors([ctrlpts], [weights], self.n_points))[0]
+        n = len(self.rows)
+        if n == 0 or k <= 0:
+            return []
+        kk = k
+        while True:
+            dist, idx = self._search(v, min(kk, n))
+            hits = [(float(d), self.rows[i]) for d, i in zip(dist, idx)
+                    if model is None or self.rows[i]["model"] == model]
+            if len(hits) >= k or kk >= n:
+                return hits[:k]
+            kk *= 4
+
+
+if __name__ == "__main__":
+    import time
+    from car_presets import CAR_MODELS
+
+    t0 = time.perf_counter()
+    index = ShapeIndex().build(load_responses(CSV_FILE))
+    print(f"インデックス作成: {len(index.rows)}件, {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    for model, preset in CAR_MODELS.items():
+        t0 = time.perf_counter()
+        hits = index.query(preset["ctrlpts"], preset["weights"], k=5, model=model)
+        dt = (time.perf_counter() - t0) * 1000
+        print(f"\n{model} の初期形状に近い回答 ({dt:.2f} ms):")
+        for d, row in hits:
+            print(f"  ID:{row['idx']:03d} {row['adjective']:9s} 距離={d:.3f}")
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+from car_presets import CAR_MODELS
+from nurbs_basis import DEGREE, QUAD_ORDER, QUAD_LEVELS, basis_matrix, quadrature_rule, rational_derivatives, shape_groups
+from survey_data import CSV_FILE, load_responses
+
+# === 設定 ===
+BOX_DELTA = 0.001     # 外形寸法（最高点・全長・屋根）を求める評価間隔
+ROOF_BAND = 0.1       # 最高点から高さのこの割合以内を屋根とみなす
+METRIC_NAMES = ["area", "centroid_x", "centroid_y", "height", "length", "aspect",
+                "roof_length", "roof_peak_pos"]
+
+
+# === シルエット（曲線 + 閉じる辺 ctrlpts[-1] -> ctrlpts[0]）の形状指標 ===
+# 面積・重心はグリーンの定理の線積分で、曲線部分はキャッシュした求積則（quadrature_rule）、
+# 閉じる辺は直線なので厳密に計算する（評価点の多角形や画素数えより速く正確）
+#   A = 1/2 ∮ (x dy - y dx),  A cx = ∮ x^2/2 dy,  A cy = -∮ y^2/2 dx
+# ctrlpts: (件数, n, 2), weights: (件数, n), ground_y: 接地線の y（None なら最下点）
+# -> {指標名: (件数,) の配列}
+def silhouette_metrics(ctrlpts, weights, ground_y=None, order=QUAD_ORDER, levels=QUAD_LEVELS):
+    P = np.asarray(ctrlpts, dtype=float)
+    w = np.asarray(weights, dtype=float)
+    n = P.shape[-2]
+
+    _, qw, N, dN = quadrature_rule(n, DEGREE, order, levels)
+    C, dC = rational_derivatives(P, w, [N, dN])
+    x, y, dx, dy = C[..., 0], C[..., 1], dC[..., 0], dC[..., 1]
+    a, b = P[..., -1, :], P[..., 0, :]
+    ex, ey = b[..., 0] - a[..., 0], b[..., 1] - a[..., 1]
+
+    area2 = (x * dy - y * dx) @ qw + a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]
+    mx = 0.5 * ((x**2 * dy) @ qw + ey * (a[..., 0]**2 + a[..., 0] * ex + ex**2 / 3))
+    my = -0.5 * ((y**2 * dx) @ qw + ex * (a[..., 1]**2 + a[..., 1] * ey + ey**2 / 3))
+    area = 0.5 * area2
+
+    # 外形寸法は細かい評価点で（基底はキャッシュ済み）
+    Nb = basis_matrix(n, DEGREE, BOX_DELTA)
+    (Cb,) = rational_derivatives(P, w, [Nb])
+    bx, by = Cb[..., 0], Cb[..., 1]
+    top = by.max(axis=-1)
+    xmin, xmax = bx.min(axis=-1), bx.max(axis=-1)
+    length = xmax - xmin
+    if ground_y is None:
+        ground_y = by.min(axis=-1)
+    height = top - np.asarray(ground_y, dtype=float)
+    roof = by >= (top - ROOF_BAND * height)[..., None]
+    roof_length = np.where(roof, bx, -np.inf).max(axis=-1) - np.where(roof, bx, np.inf).min(axis=-1)
+    peak_x = np.take_along_axis(bx, by.argmax(axis=-1)[..., None], axis=-1)[..., 0]
+
+    return {
+        "area": np.abs(area),
+        "centroid_x": mx / area,
+        "centroid_y": my / area,
+        "height": height,
+        "length": length,
+        "aspect": height / length,
+        "roof_length": roof_length,
+        "roof_peak_pos": (peak_x - xmin) / length,
+    }
+
+
+# 車種・制御点数がばらばらな形状のリストの指標（制御点数ごとにまとめて一括計算）
+# 高さは各車種の接地線から測る -> {指標名: (件数,) の配列}
+def metrics_many(models, ctrlpts_list, weights_list):
+    values = {name: np.empty(len(ctrlpts_list)) for name in METRIC_NAMES}
+    for idx, P, w, _ in shape_groups(ctrlpts_list, weights_list):
+        ground = np.array([CAR_MODELS[models[i]]["ground_line"][2] if models[i] in CAR_MODELS else np.nan
+                           for i in idx])
+        ground = np.where(np.isnan(ground), P[:, :, 1].min(axis=1), ground)
+        for name, v in silhouette_metrics(P, w, ground).items():
+            values[name][idx] = v
+    return values
+
+
+# 回答のリストの指標を表にまとめる
+def metrics_table(responses):
+    table = pd.DataFrame(metrics_many([r["model"] for r in responses], [r["ctrlpts"] for r in responses],
+                                      [r["weights"] for r in responses]))
+    table.insert(0, "idx", [r["idx"] for r in responses])
+    table.insert(1, "model", [r["model"] for r in responses])
+    return table
+
+
+if __name__ == "__main__":
+    import time
+    from matplotlib.path import Path
+    from nurbs_basis import evaluate_many, silhouette_polygon
+
+    responses = load_responses(CSV_FILE)
+    print(metrics_table(responses).groupby("model")[METRIC_NAMES].mean().round(3).to_string())
+
+    # 精度: 非常に細かい多角形（10万点）の面積との差
+    def shoelace(poly):
+        return 0.5 * abs(np.dot(poly[:, 0], np.roll(poly[:, 1], -1)) - np.dot(poly[:, 1], np.roll(poly[:, 0], -1)))
+
+    fine = [shoelace(silhouette_polygon(c, r["ctrlpts"]))
+            for c, r in zip(evaluate_many([r["ctrlpts"] for r in responses],
+                                          [r["weights"] for r in responses], 1e-5), responses)]
+    coarse = [shoelace(silhouette_polygon(c, r["ctrlpts"]))
+              for c, r in zip(evaluate_many([r["ctrlpts"] for r in responses],
+                                            [r["weights"] for r in responses]), responses)]
+    exact = metrics_table(responses)["area"].to_numpy()
+    print(f"\n面積の誤差（10万点の多角形との差の最大）: 求積 {np.max(np.abs(exact - fine)):.2e}, "
+          f"100点の多角形 {np.max(np.abs(np.array(coarse) - fine)):.2e}")
+
+    step = 0.02
+    gx, gy = np.meshgrid(np.arange(-3, 13, step) + step / 2, np.arange(-3, 8, step) + step / 2)
+    grid = np.column_stack([gx.ravel(), gy.ravel()])
+    raster = [Path(silhouette_polygon(c, r["ctrlpts"])).contains_points(grid).sum() * step**2
+              for c, r in zip(evaluate_many([r["ctrlpts"] for r in responses[:20]],
+                                            [r["weights"] for r in responses[:20]]), responses[:20])]
+    print(f"  画素数え（{step} 刻み）: {np.max(np.abs(np.array(raster) - fine[:20])):.2e}")
+
+    many = responses * 30
+    t0 = time.perf_counter()
+    metrics_table(many)
+    print(f"\n{len(many)}件の指標: {(time.perf_counter() - t0) * 1000:.1f} ms")
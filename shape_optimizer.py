@@ -0,0 +1,65 @@
+import numpy as np
+from scipy.optimize import minimize
+
+from car_presets import CAR_MODELS, POS_RANGE, WEIGHT_MIN, WEIGHT_MAX, normalize_shape, denormalize_shape
+from nurbs_basis import evaluate_curve, curve_jacobian
+from survey_data import ADJ_LABELS
+from lec09_RBF import predictgradient
+
+# === 設定 ===
+FIDELITY = 0.05   # 初期シルエットからのずれに対するペナルティの強さ
+MAX_EVAL = 300    # 関数評価回数の上限
+
+
+# === 言葉から形へ: 形容詞スコアを最大化する制御点・重みの探索 ===
+# 目的関数 = -スコア + FIDELITY * (初期曲線との平均二乗距離)
+# スコアの勾配は RBF の解析微分、曲線項は dC/dP, dC/dw の解析微分（差分近似なし）
+# 変数は正規化空間（位置 [-1, 1]、重み [0, 1] = スライダー範囲 0.1〜150）
+def optimize_shape(surrogate, adjective, start=None, fidelity=FIDELITY, max_eval=MAX_EVAL):
+    model = surrogate.model
+    preset = CAR_MODELS[model]
+    if start is None:
+        start = (preset["ctrlpts"], preset["weights"])
+    z0 = normalize_shape(model, *start)
+    n = len(preset["ctrlpts"])
+    k = ADJ_LABELS.index(adjective)
+    wk = surrogate.w[:, k]
+    base_curve = evaluate_curve(preset["ctrlpts"], preset["weights"])
+    log_ratio = np.log(WEIGHT_MAX / WEIGHT_MIN)
+
+    def objective(z):
+        score = surrogate.predict(z)[0, k]
+        grad = -predictgradient(z, wk, surrogate.c, surrogate.r)[0]
+
+        ctrlpts, weights = denormalize_shape(model, z)
+        diff = evaluate_curve(ctrlpts, weights) - base_curve
+        penalty = np.mean(np.sum(diff**2, axis=1))
+        dC_dP, dC_dw = curve_jacobian(ctrlpts, weights)
+        g_P = 2.0 * (dC_dP.T @ diff) / len(diff)
+        g_w = 2.0 * np.einsum("snd,sd->n", dC_dw, diff) / len(diff)
+        # 正規化変数への連鎖律
+        grad[:2 * n] += fidelity * POS_RANGE * g_P.ravel()
+        grad[2 * n:] += fidelity * weights * log_ratio * g_w
+        return -score + fidelity * penalty, grad
+
+    bounds = [(-1.0, 1.0)] * (2 * n) + [(0.0, 1.0)] * n
+    res = minimize(objective, z0, jac=True, method="L-BFGS-B", bounds=bounds,
+                   options={"maxfun": max_eval})
+    ctrlpts, weights = denormalize_shape(model, res.x)
+    score = float(surrogate.predict(res.x)[0, k])
+    return ctrlpts.tolist(), weights.tolist(), score, res
+
+
+if __name__ == "__main__":
+    import time
+    from adjective_surrogate import train_surrogates
+
+    adjective = "fast"
+    surrogates = train_surrogates()
+    for model, s in surrogates.items():
+        preset = CAR_MODELS[model]
+        before = s.scores(preset["ctrlpts"], preset["weights"])[adjective]
+        t0 = time.perf_counter()
+        ctrlpts, weights, after, res = optimize_shape(s, adjective)
+        dt = time.perf_counter() - t0
+        print(f"{model}: {adjective} {before:.3f} -> {after:.3f}  ({res.nfev}回評価, {dt * 1000:.0f} ms)")
@@ -0,0 +1,138 @@
+import os
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.patches import Polygon, Circle
+from sklearn.decomposition import IncrementalPCA
+
+from car_presets import CAR_MODELS, TIRE_RADIUS, normalize_shape, denormalize_shape
+from nurbs_basis import evaluate_curves, silhouette_polygon
+from survey_data import CSV_FILE, iter_responses
+
+# === 設定 ===
+OUTPUT_DIR = "shape_modes"
+N_COMPONENTS = 5            # 取り出す形状モードの数
+CHUNK_SIZE = 500            # 回答データを読み込む行数
+SIGMAS = [-2, -1, 0, 1, 2]  # モードを描画するときの ±σ
+
+
+# === 車種ごとの形状空間（制御点 + 重みの正規化ベクトルの主成分） ===
+# IncrementalPCA をバッチごとに partial_fit する（全回答をメモリに載せなくてよい）
+# 最初の partial_fit には n_components 件以上必要なので、それまでの回答は持ち越してまとめて学習する
+class ShapeSpace:
+    def __init__(self, model, n_components=N_COMPONENTS):
+        self.model = model
+        self.n_ctrlpts = len(CAR_MODELS[model]["ctrlpts"])
+        dim = 3 * self.n_ctrlpts
+        self.n_components = min(n_components, dim)
+        self.ipca = IncrementalPCA(n_components=self.n_components)
+        self.pending = np.empty((0, dim))
+        self.n_samples = 0
+
+    def _vectors(self, responses):
+        rows = [r for r in responses if r["model"] == self.model and len(r["ctrlpts"]) == self.n_ctrlpts]
+        if not rows:
+            return self.pending[:0]
+        return normalize_shape(self.model, [r["ctrlpts"] for r in rows], [r["weights"] for r in rows])
+
+    # 正規化ベクトル X (件数 x 3n) で更新
+    def partial_fit(self, X):
+        X = np.vstack([self.pending, np.asarray(X, dtype=float)])
+        if len(X) == 0 or (not self.fitted and len(X) < self.n_components):
+            self.pending = X
+            return self
+        self.ipca.partial_fit(X)
+        self.n_samples += len(X)
+        self.pending = X[:0]
+        return self
+
+    # 回答（他の車種を含んでよい）で更新
+    def update(self, responses):
+        return self.partial_fit(self._vectors(responses))
+
+    # 回答のバッチ列（iter_responses など）から学習
+    def fit_stream(self, batches):
+        for responses in batches:
+            self.update(responses)
+        return self
+
+    @property
+    def fitted(self):
+        return self.n_samples > 0
+
+    # 各モードの標準偏差（正規化空間）
+    @property
+    def sigma(self):
+        return np.sqrt(self.ipca.explained_variance_)
+
+    # 形状をモード座標（各モードの σ 単位）へ射影
+    # ctrlpts: (..., n, 2), weights: (..., n) -> (..., n_components)
+    def project(self, ctrlpts, weights):
+        X = normalize_shape(self.model, ctrlpts, weights)
+        return (X - self.ipca.mean_) @ self.ipca.components_.T / self.sigma
+
+    # モード座標 (..., n_components) から形状 (ctrlpts, weights) を復元
+    def reconstruct(self, coords):
+        coords = np.asarray(coords, dtype=float)
+        X = self.ipca.mean_ + (coords * self.sigma) @ self.ipca.components_
+        return denormalize_shape(self.model, X)
+
+    # k 番目のモードだけを t σ 動かした形状
+    def mode_shape(self, k, t):
+        coords = np.zeros(self.n_components)
+        coords[k] = t
+        return self.reconstruct(coords)
+
+    # 各モードを ±σ のシルエットとして並べて保存（行: モード, 列: σ）
+    def render_modes(self, path, sigmas=SIGMAS):
+        sigmas = list(sigmas)
+        coords = np.zeros((self.n_components, len(sigmas), self.n_components))
+        for k in range(self.n_components):
+            coords[k, :, k] = sigmas
+        ctrlpts, weights = self.reconstruct(coords)
+        curves = evaluate_curves(ctrlpts, weights)
+        ratio = self.ipca.explained_variance_ratio_
+
+        fig, axes = plt.subplots(self.n_components, len(sigmas),
+                                 figsize=(4 * len(sigmas), 2.8 * self.n_components), squeeze=False)
+        fig.suptitle(f"{self.model}: shape modes (n={self.n_samples})", fontsize=18)
+        for k in range(self.n_components):
+            for j, t in enumerate(sigmas):
+                ax = axes[k, j]
+                for c in CAR_MODELS[self.model]["tire_coords"]:
+                    ax.add_patch(Circle((c[0], c[1]), TIRE_RADIUS, color='black', zorder=1))
+                ax.add_patch(Polygon(silhouette_polygon(curves[k, j], ctrlpts[k, j]), closed=True,
+                                     color='black' if t == 0 else 'tab:blue'))
+                ax.set_aspect('equal')
+                ax.set_xlim(-3, 13)
+                ax.set_ylim(-3, 8)
+                ax.axis('off')
+                ax.set_title(f"mode {k + 1} ({ratio[k]:.0%}): {t:+g}σ", fontsize=11)
+        plt.tight_layout(rect=[0, 0, 1, 0.96])
+        plt.savefig(path, bbox_inches='tight')
+        plt.close(fig)
+
+
+# CSV を CHUNK_SIZE 行ずつ読みながら全車種の形状空間を学習
+def fit_shape_spaces(csv_file=CSV_FILE, chunksize=CHUNK_SIZE, n_components=N_COMPONENTS):
+    spaces = {model: ShapeSpace(model, n_components) for model in CAR_MODELS}
+    for responses in iter_responses(csv_file, chunksize):
+        for space in spaces.values():
+            space.update(responses)
+    return {model: s for model, s in spaces.items() if s.fitted}
+
+
+if __name__ == "__main__":
+    import time
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    spaces = fit_shape_spaces()
+    for model, space in spaces.items():
+        space.render_modes(os.path.join(OUTPUT_DIR, f"{model}_modes.png"))
+        preset = CAR_MODELS[model]
+        t0 = time.perf_counter()
+        coords = space.project(preset["ctrlpts"], preset["weights"])
+        dt = (time.perf_counter() - t0) * 1e6
+        ratio = np.cumsum(space.ipca.explained_variance_ratio_)[-1]
+        print(f"{model}: {space.n_samples}件, 上位{space.n_components}モードで分散の{ratio:.0%}")
+        print(f"  初期形状のモード座標 [σ]: {np.round(coords, 2)}  ({dt:.0f} µs)")
+    print(f"\n保存先: {os.path.abspath(OUTPUT_DIR)}")
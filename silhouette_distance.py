@@ -0,0 +1,139 @@
+import os
+import numpy as np
+from matplotlib.path import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from nurbs_basis import adaptive_sample, silhouette_polygon, resample_curves
+from survey_data import CSV_FILE, load_responses
+
+# === 設定 ===
+OUTPUT_DIR = "distance_matrix"
+N_POINTS = 128                     # 輪郭（閉じた多角形）の再サンプリング点数
+N_CURVE = 200                      # 曲線部分の評価点数（曲率に応じて配置）
+GRID_EXTENT = [-3, 13, -3, 8]      # IoU 用のラスタ範囲（描画範囲と同じ）
+CENTER = (5.0, 2.5)                # 距離計算用に座標をずらす基準点（車体のおおよその中心）
+GRID_STEP = 0.1                    # IoU 用のラスタの刻み
+TILE = 256                         # 1タスクで計算するブロックの大きさ
+METRICS = ["hausdorff", "mean_closest", "iou_distance"]   # iou_distance = 1 - IoU（0: 完全一致）
+
+
+# 曲線部分の評価点列（adaptive_sample で曲率の大きいところに点を寄せる）
+# 重みの比が大きい形状は角で急に曲がるので、一様なパラメータ（delta=0.01）の評価点では角が丸まる
+# （シルエットの面積の誤差: 一様 100点 最大 0.12 -> 曲率に応じた 200点 最大 0.003）
+def silhouette_curves(ctrlpts_list, weights_list, n_points=N_CURVE):
+    return [adaptive_sample(p, w, n_points) for p, w in zip(ctrlpts_list, weights_list)]
+
+
+# 閉じたシルエット（曲線 + 閉じる辺）を弧長で等間隔の点列に
+def outline_points(curves, ctrlpts_list, n_points=N_POINTS):
+    polys = [silhouette_polygon(c, p) for c, p in zip(curves, ctrlpts_list)]
+    polys = np.array([np.vstack([poly, poly[:1]]) for poly in polys])
+    return resample_curves(polys, n_points) - np.array(CENTER)
+
+
+# シルエット内部のマスク（形状数 x 画素数, bool）
+def silhouette_masks(curves, ctrlpts_list, extent=GRID_EXTENT, step=GRID_STEP):
+    xs = np.arange(extent[0] + step / 2, extent[1], step)
+    ys = np.arange(extent[2] + step / 2, extent[3], step)
+    gx, gy = np.meshgrid(xs, ys)
+    grid = np.column_stack([gx.ravel(), gy.ravel()])
+    masks = np.zeros((len(curves), len(grid)), dtype=bool)
+    for i, (c, p) in enumerate(zip(curves, ctrlpts_list)):
+        poly = silhouette_polygon(c, p)
+        # 外接矩形の中の画素だけを判定する（contains_points の時間は 画素数 x 頂点数 に比例）
+        inside = np.all((grid >= poly.min(axis=0)) & (grid <= poly.max(axis=0)), axis=1)
+        masks[i, inside] = Path(poly).contains_points(grid[inside])
+    return masks
+
+
+# === ワーカー（入力はメモリマップで共有） ===
+_shared = {}
+
+def _init_worker(work_dir):
+    _shared["points"] = np.load(os.path.join(work_dir, "points.npy"), mmap_mode="r")
+    _shared["masks"] = np.load(os.path.join(work_dir, "masks.npy"), mmap_mode="r")
+    _shared["out"] = {m: np.load(os.path.join(work_dir, f"{m}.npy"), mmap_mode="r+") for m in METRICS}
+
+
+def _compute_tile(task):
+    i0, i1, j0, j1 = task
+    points = _shared["points"]
+    # 拡張座標 [x, y, |p|^2, 1] と [-2x, -2y, 1, |p|^2] の内積が距離の2乗になる（1ペアあたり行列積1回）
+    # |a|^2 + |b|^2 - 2a・b は近い点どうしで桁落ちするので float64 で計算する
+    # （float32 では Hausdorff に 2e-3 程度の誤差が出る。float64 では 1e-6 未満。保存する行列は float32）
+    A = np.asarray(points[i0:i1], dtype=np.float64)
+    B = np.asarray(points[j0:j1], dtype=np.float64)
+    nA = np.sum(A**2, axis=2, keepdims=True)
+    nB = np.sum(B**2, axis=2, keepdims=True)
+    Ax = np.concatenate([-2.0 * A, np.ones_like(nA), nA], axis=2)
+    Bx = np.concatenate([B, nB, np.ones_like(nB)], axis=2)
+    diagonal = (i0 == j0)
+
+    haus = np.zeros((i1 - i0, j1 - j0))
+    mean = np.zeros((i1 - i0, j1 - j0))
+    for a in range(i1 - i0):
+        # 対角ブロックは上三角 (j >= i) だけ計算し、下三角は転置で埋める
+        b0 = a if diagonal else 0
+        # d2[b, q, p] = |B[b, q] - A[a, p]|^2
+        d2 = Bx[b0:] @ Ax[a].T
+        ab = np.sqrt(np.maximum(d2.min(axis=1), 0.0))   # A の各点から B への最短距離
+        ba = np.sqrt(np.maximum(d2.min(axis=2), 0.0))   # B の各点から A への最短距離
+        haus[a, b0:] = np.maximum(ab.max(axis=1), ba.max(axis=1))
+        mean[a, b0:] = 0.5 * (ab.mean(axis=1) + ba.mean(axis=1))
+
+    MA = np.asarray(_shared["masks"][i0:i1], dtype=np.float32)
+    MB = np.asarray(_shared["masks"][j0:j1], dtype=np.float32)
+    inter = MA @ MB.T
+    union = MA.sum(axis=1)[:, None] + MB.sum(axis=1)[None, :] - inter
+    iou_distance = 1.0 - np.where(union > 0, inter / np.where(union > 0, union, 1.0), 1.0)
+
+    if diagonal:
+        upper = np.triu(np.ones(haus.shape, dtype=bool))
+        haus = np.where(upper, haus, haus.T)
+        mean = np.where(upper, mean, mean.T)
+        np.fill_diagonal(haus, 0.0)
+        np.fill_diagonal(mean, 0.0)
+
+    for name, block in zip(METRICS, [haus, mean, iou_distance]):
+        out = _shared["out"][name]
+        out[i0:i1, j0:j1] = block
+        out[j0:j1, i0:i1] = block.T
+    for out in _shared["out"].values():
+        out.flush()
+    return task
+
+
+# 全ペアの距離行列を計算し、OUTPUT_DIR/{hausdorff, mean_closest, iou_distance}.npy に保存する
+# ブロック（上三角のみ）をプロセスプールで並列計算し、結果はメモリマップに直接書き込む
+def all_pairs_distances(responses, out_dir=OUTPUT_DIR, tile=TILE, workers=None):
+    os.makedirs(out_dir, exist_ok=True)
+    ctrlpts_list = [r["ctrlpts"] for r in responses]
+    curves = silhouette_curves(ctrlpts_list, [r["weights"] for r in responses])
+    np.save(os.path.join(out_dir, "points.npy"), outline_points(curves, ctrlpts_list))
+    np.save(os.path.join(out_dir, "masks.npy"), silhouette_masks(curves, ctrlpts_list))
+    np.save(os.path.join(out_dir, "ids.npy"), np.array([r["idx"] for r in responses]))
+
+    n = len(responses)
+    for name in METRICS:
+        np.lib.format.open_memmap(os.path.join(out_dir, f"{name}.npy"), mode="w+",
+                                  dtype=np.float32, shape=(n, n)).flush()
+
+    tasks = [(i0, min(i0 + tile, n), j0, min(j0 + tile, n))
+             for i0 in range(0, n, tile) for j0 in range(i0, n, tile)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(out_dir,)) as ex:
+        for _ in ex.map(_compute_tile, tasks):
+            pass
+
+    return {name: np.load(os.path.join(out_dir, f"{name}.npy"), mmap_mode="r") for name in METRICS}
+
+
+if __name__ == "__main__":
+    import time
+
+    responses = load_responses(CSV_FILE)
+    t0 = time.perf_counter()
+    matrices = all_pairs_distances(responses)
+    print(f"{len(responses)}件の全ペア距離: {time.perf_counter() - t0:.2f} 秒 -> {os.path.abspath(OUTPUT_DIR)}")
+    for name, mat in matrices.items():
+        off = mat[~np.eye(len(mat), dtype=bool)]
+        print(f"  {name}: 平均 {off.mean():.3f}, 最小 {off.min():.3f}, 最大 {off.max():.3f}")
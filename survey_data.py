@@ -0,0 +1,176 @@
+import numpy as np
+import pandas as pd
+import json
+import ast
+import re
+
+from car_presets import normalize_model_name
+
+# === 設定 ===
+CSV_FILE = "car_data.csv"
+MIN_CTRLPTS = 4   # 3次の NURBS 曲線に必要な制御点数（degree + 1）
+
+# 形容詞リスト設定
+ADJECTIVES = ["cute", "cool", "sturdy", "fast", "luxury", "familiar",
+              "かわいい", "かっこいい", "頑丈そう", "速そう", "高級な", "親しみのある"]
+ADJ_MAP = {
+    "かわいい": "cute", "かっこいい": "cool", "頑丈そう": "sturdy",
+    "速そう": "fast", "高級な": "luxury", "親しみのある": "familiar"
+}
+ADJ_LABELS = ["cute", "cool", "sturdy", "fast", "luxury", "familiar"]
+
+
+# === ヘルパー関数群 ===
+def find_keyword(text, keywords, default="unknown"):
+    text_str = str(text).lower()
+    for k in keywords:
+        if k.lower() in text_str:
+            return k
+    return default
+
+def get_age_label(text):
+    match = re.search(r'(\d+s)', str(text))
+    if match:
+        return match.group(1)
+    return "unknown"
+
+def get_gender_label(text):
+    text_str = str(text).upper()
+    if "(M)" in text_str or "男性" in text_str: return "M"
+    if "(F)" in text_str or "女性" in text_str: return "F"
+    if "M" in text_str and "F" not in text_str: return "M"
+    if "F" in text_str and "M" not in text_str: return "F"
+    return "unknown"
+
+def parse_list(text):
+    try:
+        return json.loads(text)
+    except Exception:
+        return ast.literal_eval(text)
+
+
+# === CSV 読み込み ===
+def read_raw_csv(csv_file=CSV_FILE):
+    try:
+        return pd.read_csv(csv_file, header=None, encoding='utf-8-sig', on_bad_lines='skip')
+    except Exception:
+        print("UTF-8での読み込みに失敗、cp932で試行します...")
+        return pd.read_csv(csv_file, header=None, encoding='cp932', on_bad_lines='skip')
+
+
+# 生データの各行から回答者情報と制御点・重みの文字列を取り出す
+def clean_rows(df_raw):
+    cleaned_data = []
+
+    for index, row in df_raw.iterrows():
+        try:
+            row_list = [str(x) for x in row.tolist()]
+
+            # 制御点データの位置を探す（[[...]] を目印にする）
+            ctrl_idx = -1
+            for i, val in enumerate(row_list):
+                if val.strip().startswith('[['):
+                    ctrl_idx = i
+                    break
+
+            if ctrl_idx == -1:
+                continue
+
+            # 相対位置からデータを取得
+            gender_raw = row_list[ctrl_idx - 3] if ctrl_idx >= 3 else ""
+            age_raw    = row_list[ctrl_idx - 2] if ctrl_idx >= 2 else ""
+            model_raw  = row_list[ctrl_idx - 1]
+            ctrl_raw   = row_list[ctrl_idx]
+            weight_raw = row_list[ctrl_idx + 1]
+            adj_raw    = row_list[ctrl_idx + 3] if len(row_list) > ctrl_idx + 3 else "unknown"
+
+            # 形容詞の抽出と英語変換
+            found_adj = find_keyword(adj_raw, ADJECTIVES, default="unknown")
+            if found_adj in ADJ_MAP:
+                found_adj = ADJ_MAP[found_adj]
+
+            cleaned_data.append({
+                "timestamp": row_list[0],
+                "gender": get_gender_label(gender_raw),
+                "age": get_age_label(age_raw),
+                "model": normalize_model_name(model_raw),
+                "adjective": found_adj,
+                "ctrlpts": ctrl_raw,
+                "weights": weight_raw,
+                "idx": index + 1  # スプレッドシートの行番号(1始まり)
+            })
+
+        except Exception:
+            pass
+
+    return cleaned_data
+
+
+# 制御点・重みの文字列をリストに変換（重みの数は app3.py と同じく制御点数にそろえる）
+# 形が (n, 2) でない・制御点が MIN_CTRLPTS 未満・数値でない・重みが正でない場合は ValueError
+# （まとめて評価する処理が1行のせいで全体ごと止まらないように、ここで弾く）
+def parse_shape(row):
+    ctrlpts = parse_list(row['ctrlpts'])
+    weights = parse_list(row['weights'])
+    if not isinstance(ctrlpts, list) or not isinstance(weights, list):
+        raise ValueError("制御点・重みがリストではありません")
+    if len(weights) < len(ctrlpts):
+        weights = weights + [weights[-1] if weights else 1.0] * (len(ctrlpts) - len(weights))
+    weights = weights[:len(ctrlpts)]
+
+    try:
+        P = np.array(ctrlpts, dtype=float)
+        w = np.array(weights, dtype=float)
+    except (TypeError, ValueError):
+        raise ValueError("制御点・重みの形がそろっていないか、数値ではありません") from None
+    if P.ndim != 2 or P.shape[1] != 2:
+        raise ValueError(f"制御点の形が (n, 2) ではありません: {P.shape}")
+    if len(P) < MIN_CTRLPTS:
+        raise ValueError(f"制御点が {len(P)} 個しかありません（{MIN_CTRLPTS} 個以上必要）")
+    if w.shape != (len(P),):
+        raise ValueError(f"重みの形が制御点と合いません: {w.shape}")
+    if not (np.all(np.isfinite(P)) and np.all(np.isfinite(w)) and np.all(w > 0)):
+        raise ValueError("制御点・重みに不正な値があります")
+    return P.tolist(), w.tolist()
+
+
+# clean_rows の結果の ctrlpts / weights をリストに変換（解析できない・不正な形の行は飛ばして表示する）
+def parse_rows(rows):
+    responses = []
+    dropped = []
+    for row in rows:
+        try:
+            ctrlpts, weights = parse_shape(row)
+        except Exception as e:
+            print(f"制御点の解析エラー (row {row['idx']}): {e}")
+            dropped.append(row['idx'])
+            continue
+        responses.append(dict(row, ctrlpts=ctrlpts, weights=weights))
+    if dropped:
+        print(f"{len(dropped)}件の回答を除外しました: 行 {dropped}")
+    return responses
+
+
+# 解析済みの回答一覧（ctrlpts / weights はリスト）
+def load_responses(csv_file=CSV_FILE):
+    return parse_rows(clean_rows(read_raw_csv(csv_file)))
+
+
+# 回答を chunksize 行ずつ読み込んで返す（大きな CSV をまとめて読まないための版）
+# 文字コードは先に全体を確認して決める（途中で cp932 に切り替えて同じ行を二度返さないように）
+def iter_responses(csv_file=CSV_FILE, chunksize=1000):
+    encoding = 'utf-8-sig'
+    try:
+        with open(csv_file, encoding=encoding) as f:
+            for _ in iter(lambda: f.read(1 << 20), ''):
+                pass
+    except UnicodeDecodeError:
+        encoding = 'cp932'
+    reader = pd.read_csv(csv_file, header=None, encoding=encoding, on_bad_lines='skip', chunksize=chunksize)
+    for df_raw in reader:
+        yield parse_rows(clean_rows(df_raw))
+
+
+# 出力ファイル名と同じ並び順のキー（例: 001_SUV_20s_M_cool）
+def response_name(row):
+    return f"{row['idx']:03d}_{row['model']}_{row['age']}_{row['gender']}_{row['adjective']}"
@@ -0,0 +1,63 @@
+import os
+import pandas as pd
+
+# Excelファイル名
+file_path = "判定済みデータ.xlsx"
+
+# シートごとの列名対応辞書
+column_map = {
+    "Pattern1": {"amps": "Amps", "lower": "区間の下限値", "upper": "区間の上限値", "center": "中心値", "judge": "判定"},
+    "Pattern2": {"amps": "Amp",  "lower": "区間の下限値", "upper": "区間の上限値", "center": "中心値", "judge": "判定"},
+    "Pattern3": {"amps": "Amps", "lower": "区間の下限値", "upper": "区間の上限値", "center": "中心値", "judge": "判定"},
+    "Pattern4": {"amps": "Amps", "lower": "区間の下限値", "upper": "区間の上限値", "center": "中心値", "judge": "判定"},
+}
+
+# 正規化後の列名（column_map のキー）
+standard_columns = {key: key for key in column_map["Pattern1"]}
+
+
+def snapshot_path(path):
+    return path + ".cache.pkl"
+
+
+# 全シートを一度に読み込む（列名の空白は除去済み）
+# 読み込み結果はバイナリのスナップショットに保存し、ブックの更新時刻・サイズが同じなら XLSX を解析しない
+def load_sheets(path=file_path, use_cache=True):
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    cache_file = snapshot_path(path)
+
+    if use_cache and os.path.exists(cache_file):
+        try:
+            snapshot = pd.read_pickle(cache_file)
+            if snapshot["key"] == key:
+                return snapshot["sheets"]
+        except Exception:
+            pass
+
+    sheets = pd.read_excel(path, sheet_name=None)
+    for df in sheets.values():
+        df.columns = df.columns.str.strip() # 空白除去
+
+    if use_cache:
+        try:
+            pd.to_pickle({"key": key, "sheets": sheets}, cache_file)
+        except OSError as e:
+            print(f"スナップショットを保存できませんでした: {e}")
+    return sheets
+
+
+# column_map に従って列名を正規化（amps / lower / upper / center / judge）
+# 列マップが未定義のシートはそのまま返す
+def normalize_columns(sheet, df):
+    if sheet not in column_map:
+        return df
+    rename = {name: key for key, name in column_map[sheet].items()}
+    return df.rename(columns=rename)
+
+
+def load_workbook(path=file_path, normalize=True, use_cache=True):
+    sheets = load_sheets(path, use_cache)
+    if normalize:
+        sheets = {sheet: normalize_columns(sheet, df) for sheet, df in sheets.items()}
+    return sheets